@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Anytime Repairing A* (ARA*). The first search uses a heavily weighted heuristic (f = g + w * h) and finds a
+path quickly; every next search lowers the weight and continues from the costs found so far, re-expanding only
+the rooms that got cheaper. Every path is at most bound times as expensive as the cheapest path. The search
+stops when the weight reaches 1 (the path is optimal) or when the time or expansion budget is used up.
+"""
+import time
+from array import array
+from fringe import Fringe
+from state import State
+from heuristics import make_heuristic
+
+INFINITY = float("inf")
+NO_PARENT = -1
+
+
+class Budget:
+    """Settings of an anytime search"""
+
+    def __init__(self, weight=3.0, step=0.5, time_limit=None, max_expansions=None, report=None):
+        """
+        :param weight: The weight of the heuristic in the first search, at least 1
+        :param step: How much the weight is lowered after every search
+        :param time_limit: Seconds after which no more rooms are expanded, None for no limit
+        :param max_expansions: The number of expansions after which the search stops, None for no limit
+        :param report: Function called as report(cost, bound, weight, expansions, seconds) for every path
+                       found, None to not report
+        """
+        self.weight = max(1.0, weight)
+        self.step = step
+        self.time_limit = time_limit
+        self.max_expansions = max_expansions
+        self.report = report
+
+
+def print_improvement(cost, bound, weight, expansions, seconds):
+    """ Prints a path found by the anytime search, can be used as the report function of a Budget """
+    print("path cost: %d, at most %.3f times the cheapest, weight %.2f, %d expansions, %.4f s"
+          % (cost, bound, weight, expansions, seconds))
+
+
+def ara_star(maze, backend="FAST", heuristic_name="MANHATTAN", start=None, goal=None, budget=None, stats=None,
+             events=None):
+    """
+    Anytime A* with a decreasing weight on the heuristic, see the top of this file
+    :param maze: The maze to solve
+    :param backend: backend of the fringe, FAST or THREADSAFE
+    :param heuristic_name: The heuristic to use, see heuristics.make_heuristic
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param budget: Budget with the weights and limits, None for the default Budget
+    :param stats: SearchStats that gets the counters and fringes of all searches (one per weight), None to not
+                  count
+    :param events: search_events.Events that gets the expansions, None to not make events
+    :return: Generator of event batches (see search_events.py) that returns
+             (state of the goal room with the best path found or None, fringe of the last search)
+    """
+    if start is None:
+        start = maze.get_index(maze.get_start())
+    if goal is None:
+        goal = maze.get_index(maze.get_goal())
+    budget = Budget() if budget is None else budget
+    h = make_heuristic(maze, heuristic_name, goal)
+    fringe_type = "PRIORITY" if backend == "THREADSAFE" else "INDEXED"
+    began = time.perf_counter()
+    deadline = None if budget.time_limit is None else began + budget.time_limit
+
+    n = maze.get_size()
+    g = array('d', [INFINITY]) * n
+    parents = array('q', [NO_PARENT]) * n
+    g[start] = 0
+    weight = budget.weight
+    # OPEN: rooms in the fringe, CLOSED: rooms expanded in this search, INCONS: closed rooms that got cheaper
+    open_rooms = {start}
+    closed = bytearray(n)
+    incons = set()
+    expansions = 0
+    expanded_before = bytearray(n) if stats is not None else None
+    fr = Fringe(fringe_type, backend, key=int)
+    fr.push(start, weight * h(start))
+
+    def improve_path():
+        """
+        Expands rooms until no room in the fringe can give a cheaper path to the goal
+        :return: Generator of event batches that returns False if the budget is used up, True otherwise
+        """
+        nonlocal expansions
+        while not fr.is_empty():
+            priority, index = fr.pop()
+            cost = g[index]
+            if index not in open_rooms or priority > cost + weight * h(index):
+                if stats is not None:
+                    stats.duplicates += 1
+                continue    # stale entry of the PRIORITY fringe
+            if priority >= g[goal]:
+                fr.push(index, priority)
+                return True
+            if budget.max_expansions is not None and expansions >= budget.max_expansions:
+                fr.push(index, priority)
+                return False
+            if deadline is not None and expansions % 64 == 0 and time.perf_counter() > deadline:
+                fr.push(index, priority)
+                return False
+            open_rooms.discard(index)
+            closed[index] = 1
+            expansions += 1
+            successors = maze.neighbors(index)
+            pushed = 0
+            for new_index, step_cost in successors:
+                new_cost = cost + step_cost
+                if new_cost < g[new_index]:
+                    g[new_index] = new_cost
+                    parents[new_index] = index
+                    if closed[new_index]:
+                        incons.add(new_index)
+                    else:
+                        open_rooms.add(new_index)
+                        fr.push(new_index, new_cost + weight * h(new_index))
+                        pushed += 1
+            if stats is not None:
+                stats.expanded += 1
+                if expanded_before[index]:
+                    stats.reopened += 1     # expanded by a search with a higher weight
+                expanded_before[index] = 1
+                stats.generated += pushed
+                stats.duplicates += len(successors) - pushed
+            if events is not None and events.add(index, cost, priority, fr.get_size()):
+                yield events.take()
+        return True
+
+    def path_to_goal():
+        path = []
+        index = goal
+        while index != NO_PARENT:
+            path.append(index)
+            index = parents[index]
+        path.reverse()
+        return path
+
+    solution = None
+    while True:
+        within_budget = yield from improve_path()
+        if stats is not None:
+            stats.iterations += 1
+            stats.add_fringe(fr)
+        if g[goal] < INFINITY and (solution is None or g[goal] < solution.get_cost() or within_budget):
+            solution = State.from_path(maze, path_to_goal())
+            if budget.report is not None:
+                lowest = min((g[index] + h(index) for index in open_rooms | incons), default=INFINITY)
+                bound = min(weight, g[goal] / lowest) if lowest > 0 else weight
+                budget.report(solution.get_cost(), max(1.0, bound), weight, expansions, time.perf_counter() - began)
+        if not within_budget or weight <= 1.0 or (g[goal] == INFINITY and fr.is_empty()):
+            return solution, fr
+
+        # lower the weight and continue with the rooms of the fringe and the rooms that got cheaper
+        weight = max(1.0, weight - budget.step)
+        open_rooms |= incons
+        incons.clear()
+        closed = bytearray(n)
+        fr = Fringe(fringe_type, backend, key=int)
+        for index in open_rooms:
+            fr.push(index, g[index] + weight * h(index))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Runs a set of algorithms on many maze files on all cores and writes one result per (maze, algorithm).
+
+usage: python3 batch_runner.py MAZE... [--algorithms=BFS,ASTAR,...] [--heuristic=NAME] [--output=FILE]
+                               [--format=jsonl|csv] [--jobs=N] [--compact] [--no-trace-memory]
+
+A MAZE is a .maze file, a directory (all .maze files in it) or a glob pattern such as "mazes/*.maze".
+Without --algorithms all algorithms are run, without --output the results are written to stdout.
+
+Every result has the path cost and length (number of moves), the fringe statistics (summed over the fringes
+of the bidirectional searches), the time to load the maze and the wall time of the search and the peak memory
+allocated by the search (measured with tracemalloc, which slows the search down; --no-trace-memory turns
+it off). A search that fails, e.g. because the fringe is full, gives a result with an error.
+"""
+import contextlib
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from maze import Maze
+from maze_solver import ALGORITHMS, search
+from heuristics import HEURISTICS
+
+FIELDS = ("maze", "algorithm", "heuristic", "solved", "cost", "length", "fringe_size", "max_fringe_size",
+          "insertions", "deletions", "load_time", "search_time", "peak_memory", "error")
+
+
+def run_job(job):
+    """
+    Solves one maze with one algorithm, nothing is printed
+    :param job: Tuple (maze file, algorithm, heuristic name, compact, trace memory)
+    :return: Dict with a value for every name in FIELDS
+    """
+    file_name, algorithm, heuristic_name, compact, trace_memory = job
+    result = dict.fromkeys(FIELDS)
+    result.update(maze=file_name, algorithm=algorithm, heuristic=heuristic_name, solved=False)
+    # the solvers print when the fringe is full, that output is not part of the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            begin = time.perf_counter()
+            maze = Maze(file_name, compact=compact)
+            result["load_time"] = time.perf_counter() - begin
+
+            if trace_memory:
+                tracemalloc.start()
+            begin = time.perf_counter()
+            try:
+                state, fringes = search(maze, algorithm, heuristic_name=heuristic_name)
+            finally:
+                result["search_time"] = time.perf_counter() - begin
+                if trace_memory:
+                    result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+        except SystemExit:
+            result["error"] = "fringe full"
+            return result
+        except Exception as e:
+            result["error"] = "%s: %s" % (type(e).__name__, e)
+            return result
+
+    result["fringe_size"] = sum(fr.get_size() for fr in fringes)
+    result["max_fringe_size"] = sum(fr.get_max_size() for fr in fringes)
+    result["insertions"] = sum(fr.get_insertions() for fr in fringes)
+    result["deletions"] = sum(fr.get_deletions() for fr in fringes)
+    if state is not None:
+        result["solved"] = True
+        result["cost"] = state.get_cost()
+        result["length"] = state.get_depth()
+    return result
+
+
+def find_mazes(patterns):
+    """
+    :param patterns: Maze files, directories and glob patterns
+    :return: Sorted list of the maze files, without duplicates
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.update(glob.glob(os.path.join(pattern, "*.maze")))
+        elif any(c in pattern for c in "*?["):
+            files.update(glob.glob(pattern))
+        else:
+            files.add(pattern)
+    return sorted(files)
+
+
+def write_results(results, out, output_format="jsonl"):
+    """
+    Writes the results while they come in
+    :param results: Iterable of result dicts, see run_job
+    :param out: Text stream to write to
+    :param output_format: jsonl (one JSON object per line) or csv
+    """
+    if output_format == "csv":
+        writer = csv.DictWriter(out, FIELDS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+    else:
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+
+
+def run_batch(mazes, algorithms, heuristic_name="MANHATTAN", jobs=None, compact=False, trace_memory=True):
+    """
+    Runs every algorithm on every maze in a pool of processes
+    :param mazes: List of maze files
+    :param algorithms: List of algorithm names, see maze_solver.ALGORITHMS
+    :param heuristic_name: The heuristic of the informed searches
+    :param jobs: The number of processes, None uses one per core
+    :param compact: If True, the mazes are kept in the compact grid only
+    :param trace_memory: If True, the peak memory of every search is measured
+    :return: Iterator over the result dicts in the order of the mazes and algorithms
+    """
+    work = [(file_name, algorithm, heuristic_name, compact, trace_memory)
+            for file_name in mazes for algorithm in algorithms]
+    workers = jobs or os.cpu_count() or 1
+    # small chunks keep all processes busy when some mazes take much longer than others
+    chunk_size = min(16, max(1, len(work) // (4 * workers)))
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(run_job, work, chunksize=chunk_size)
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+    usage = ("Usage: python3 batch_runner.py MAZE... [--algorithms=BFS,ASTAR,...] [--heuristic=NAME] "
+             "[--output=FILE] [--format=jsonl|csv] [--jobs=N] [--compact] [--no-trace-memory]")
+    mazes = find_mazes(args)
+    if not mazes:
+        print(usage)
+        exit(-1)
+
+    algorithms = [name.upper() for name in options.get("algorithms", ",".join(ALGORITHMS)).split(",") if name]
+    for algorithm in algorithms:
+        if algorithm not in ALGORITHMS:
+            print("Error: search algorithm (" + algorithm + ") not in the list of possible algorithms " +
+                  str(list(ALGORITHMS)))
+            exit(-1)
+    heuristic_name = options.get("heuristic", "MANHATTAN").upper()
+    if heuristic_name not in HEURISTICS:
+        print("Error: heuristic (" + heuristic_name + ") not in the list of possible heuristics " +
+              str(list(HEURISTICS)))
+        exit(-1)
+    output_format = options.get("format", "jsonl")
+    if output_format not in ("jsonl", "csv"):
+        print(usage)
+        exit(-1)
+
+    results = run_batch(mazes, algorithms, heuristic_name, int(options["jobs"]) if "jobs" in options else None,
+                        "compact" in options, "no-trace-memory" not in options)
+    if "output" in options:
+        with open(options["output"], "w", newline="") as out:
+            write_results(results, out, output_format)
+    else:
+        write_results(results, sys.stdout, output_format)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+from fringe import Fringe
+from state import State
+from heuristics import make_heuristic
+
+
+def join_paths(parents, meet):
+    """
+    Joins the paths of the forward and the backward search
+    :param parents: (forward parents, backward parents), dicts mapping a room to the previous room on that side
+    :param meet: Room where both searches met
+    :return: List of room indices from the start room to the goal room
+    """
+    path = []
+    index = meet
+    while index is not None:
+        path.append(index)
+        index = parents[0][index]
+    path.reverse()
+    index = parents[1][meet]
+    while index is not None:
+        path.append(index)
+        index = parents[1][index]
+    return path
+
+
+def bidirectional_bfs(maze, backend="FAST", start=None, goal=None, stats=None, events=None):
+    """
+    Breadth first search from the start and from the goal at the same time. The smaller fringe
+    expands a whole layer at a time; the backward search follows the connections in reverse.
+    :param maze: The maze to solve
+    :param backend: backend of the fringes, FAST or THREADSAFE
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param stats: SearchStats to count the expansions of both sides in, None to not count them
+    :param events: search_events.Events that gets the expansions, None to not make events
+    :return: Generator of event batches (see search_events.py) that returns
+             (state of the goal room or None if there is no path, (forward fringe, backward fringe))
+    """
+    if start is None:
+        start = maze.get_index(maze.get_start())
+    if goal is None:
+        goal = maze.get_index(maze.get_goal())
+    fringes = (Fringe("FIFO", backend), Fringe("FIFO", backend))
+    expand = (maze.neighbors, maze.predecessors)
+    # per side: room -> previous room on that side, and room -> number of moves from the start of that side
+    parents = ({start: None}, {goal: None})
+    depths = ({start: 0}, {goal: 0})
+    if start == goal:
+        return State.from_path(maze, [start]), fringes
+    fringes[0].push(start)
+    fringes[1].push(goal)
+
+    while not fringes[0].is_empty() and not fringes[1].is_empty():
+        side = 0 if fringes[0].get_size() <= fringes[1].get_size() else 1
+        fr = fringes[side]
+        own_parents, own_depths = parents[side], depths[side]
+        other_depths = depths[1 - side]
+        meet = None
+        best = None
+        # expand the whole layer, so the meeting room with the fewest moves is found
+        for _ in range(fr.get_size()):
+            _, index = fr.pop()
+            successors = expand[side](index)
+            pushed = 0
+            for new_index, _ in successors:
+                if new_index in own_parents:
+                    continue
+                own_parents[new_index] = index
+                own_depths[new_index] = own_depths[index] + 1
+                if new_index in other_depths:
+                    total = own_depths[new_index] + other_depths[new_index]
+                    if best is None or total < best:
+                        best = total
+                        meet = new_index
+                fr.push(new_index)
+                pushed += 1
+            if stats is not None:
+                stats.expanded += 1
+                stats.generated += pushed
+                stats.duplicates += len(successors) - pushed
+            if events is not None and events.add(index, own_depths[index], own_depths[index],
+                                                 fringes[0].get_size() + fringes[1].get_size()):
+                yield events.take()
+        if meet is not None:
+            return State.from_path(maze, join_paths(parents, meet)), fringes
+    return None, fringes
+
+
+def bidirectional_astar(maze, backend="FAST", heuristic_name="MANHATTAN", start=None, goal=None, stats=None,
+                        events=None):
+    """
+    A* from the start to the goal and from the goal to the start at the same time (symmetric approach).
+    The search stops when the lowest f value of a fringe is not lower than the cost of the best path
+    found, which gives an optimal path for a consistent heuristic.
+    :param maze: The maze to solve
+    :param backend: backend of the fringes, FAST or THREADSAFE
+    :param heuristic_name: The heuristic to use, see heuristics.make_heuristic
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param stats: SearchStats to count the expansions of both sides in, None to not count them
+    :param events: search_events.Events that gets the expansions, None to not make events
+    :return: Generator of event batches (see search_events.py) that returns
+             (state of the goal room or None if there is no path, (forward fringe, backward fringe))
+    """
+    if start is None:
+        start = maze.get_index(maze.get_start())
+    if goal is None:
+        goal = maze.get_index(maze.get_goal())
+    fringe_type = "PRIORITY" if backend == "THREADSAFE" else "INDEXED"
+    fringes = (Fringe(fringe_type, backend, key=int), Fringe(fringe_type, backend, key=int))
+    expand = (maze.neighbors, maze.predecessors)
+    heuristics = (make_heuristic(maze, heuristic_name, goal), make_heuristic(maze, heuristic_name, start, reverse=True))
+    parents = ({start: None}, {goal: None})
+    costs = ({start: 0}, {goal: 0})
+    closed = (set(), set())     # per side: the expanded rooms, only kept to count the reopened ones in stats
+    if start == goal:
+        return State.from_path(maze, [start]), fringes
+    fringes[0].push(start, heuristics[0](start))
+    fringes[1].push(goal, heuristics[1](goal))
+    best = float("inf")
+    meet = None
+
+    while not fringes[0].is_empty() and not fringes[1].is_empty():
+        side = 0 if fringes[0].get_size() <= fringes[1].get_size() else 1
+        fr = fringes[side]
+        own_parents, own_costs = parents[side], costs[side]
+        other_costs = costs[1 - side]
+        h = heuristics[side]
+
+        priority, index = fr.pop()
+        cost = own_costs[index]
+        if priority > cost + h(index):
+            if stats is not None:
+                stats.duplicates += 1
+            continue    # stale entry of the PRIORITY fringe
+        if priority >= best:
+            break       # no room in this fringe can be on a path cheaper than the best one found
+        successors = expand[side](index)
+        pushed = 0
+        for new_index, step_cost in successors:
+            new_cost = cost + step_cost
+            if new_cost < own_costs.get(new_index, float("inf")):
+                own_costs[new_index] = new_cost
+                own_parents[new_index] = index
+                fr.push(new_index, new_cost + h(new_index))
+                pushed += 1
+                if new_index in other_costs and new_cost + other_costs[new_index] < best:
+                    best = new_cost + other_costs[new_index]
+                    meet = new_index
+        if stats is not None:
+            stats.expanded += 1
+            if index in closed[side]:
+                stats.reopened += 1
+            closed[side].add(index)
+            stats.generated += pushed
+            stats.duplicates += len(successors) - pushed
+        if events is not None and events.add(index, cost, priority, fringes[0].get_size() + fringes[1].get_size()):
+            yield events.take()
+
+    if meet is None:
+        return None, fringes
+    return State.from_path(maze, join_paths(parents, meet)), fringes
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+from array import array
+
+
+class ClosedSet:
+    """Set of rooms indexed on their coordinates, with constant time membership tests"""
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.__flags = bytearray(maze.get_size())
+        self.__size = 0
+
+    def add(self, room):
+        """
+        Marks a room as closed (expanded)
+        :param room: The room to add
+        """
+        self.add_index(room.get_index())
+
+    def add_index(self, index):
+        """
+        Marks the room with the given index as closed (expanded)
+        :param index: The index of the room to add
+        """
+        if not self.__flags[index]:
+            self.__flags[index] = 1
+            self.__size += 1
+
+    def __contains__(self, room):
+        """
+        :param room: The room to look up
+        :return: True if the room is in the set, False otherwise
+        """
+        return self.__flags[room.get_index()] == 1
+
+    def contains_index(self, index):
+        """
+        :param index: The index of the room to look up
+        :return: True if the room is in the set, False otherwise
+        """
+        return self.__flags[index] == 1
+
+    def __len__(self):
+        """
+        :return: The number of rooms in the set
+        """
+        return self.__size
+
+
+class BestCost:
+    """Table holding the cheapest known cost (g) to reach every room of a maze"""
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.__costs = array('d', [float('inf')]) * maze.get_size()
+
+    def get(self, room):
+        """
+        :param room: The room to look up
+        :return: The cheapest known cost to reach the room, inf if it was never reached
+        """
+        return self.__costs[room.get_index()]
+
+    def get_by_index(self, index):
+        """
+        :param index: The index of the room to look up
+        :return: The cheapest known cost to reach the room, inf if it was never reached
+        """
+        return self.__costs[index]
+
+    def improve(self, room, cost):
+        """
+        Stores cost for room if it is cheaper than the best known cost
+        :param room: The room that is reached
+        :param cost: The cost with which the room is reached
+        :return: True if cost is an improvement, False if the room was already reached at least as cheap
+        """
+        return self.improve_index(room.get_index(), cost)
+
+    def improve_index(self, index, cost):
+        """
+        Stores cost for the room with the given index if it is cheaper than the best known cost
+        :return: True if cost is an improvement, False if the room was already reached at least as cheap
+        """
+        if cost < self.__costs[index]:
+            self.__costs[index] = cost
+            return True
+        return False
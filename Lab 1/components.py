@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Strongly connected components of the connection graph of a maze, stored per maze file in a .scc file next
+to it. The moves UP and DOWN are one-way, so two rooms are in the same component when each can be reached
+from the other. The components are numbered in the order Tarjan's algorithm finishes them, so a move from
+component a to another component b always has a > b. With this:
+    - a start room with a lower component number than the goal room can not reach it (O(1)),
+    - for a goal, the components that can reach it are found in one pass over the graph of components.
+"""
+import os
+import struct
+from array import array
+from maze_cache import cache_source, temp_name
+
+MAGIC = b"MAZESCC2"
+HEADER = struct.Struct("=8sqqqqq")
+UNVISITED = -1
+
+
+class Components:
+    """The strongly connected component of every room and the moves between the components"""
+
+    def __init__(self, labels, count, dag_offsets, dag_targets):
+        """
+        :param labels: Array with the component number of every room
+        :param count: The number of components
+        :param dag_offsets: CSR offsets of the moves between components: the components reachable in one move
+                            from component c are dag_targets[dag_offsets[c]:dag_offsets[c + 1]]
+        :param dag_targets: CSR targets of the moves between components
+        """
+        self.labels = labels
+        self.count = count
+        self.dag_offsets = dag_offsets
+        self.dag_targets = dag_targets
+        self.reaching = {}      # goal component -> bytearray, 1 for the components that can reach it
+        self.reaching_rooms = None      # (goal component, bytearray with 1 for the rooms that can reach it)
+
+    @staticmethod
+    def compute(maze):
+        """
+        Labels the rooms with Tarjan's algorithm, without recursion so the depth of a maze is not limited
+        :param maze: The maze
+        :return: Components
+        """
+        grid = maze.grid
+        grid.update_adjacency()
+        offsets = grid.adjacency_offsets
+        targets = grid.adjacency_targets
+        n = grid.size
+        order = array('q', [UNVISITED]) * n     # the number of a room in the order of the depth first search
+        low = array('q', [UNVISITED]) * n       # the lowest order reachable from the room within its subtree
+        labels = array('i', [UNVISITED]) * n
+        on_stack = bytearray(n)
+        stack = []
+        count = 0
+        visited = 0
+        for root in range(n):
+            if order[root] != UNVISITED:
+                continue
+            order[root] = low[root] = visited
+            visited += 1
+            stack.append(root)
+            on_stack[root] = 1
+            calls = [(root, offsets[root])]     # (room, next edge) of the depth first search
+            while calls:
+                index, edge = calls[-1]
+                end = offsets[index + 1]
+                while edge < end:
+                    other = targets[edge]
+                    edge += 1
+                    if order[other] == UNVISITED:
+                        calls[-1] = (index, edge)
+                        order[other] = low[other] = visited
+                        visited += 1
+                        stack.append(other)
+                        on_stack[other] = 1
+                        calls.append((other, offsets[other]))
+                        break
+                    if on_stack[other] and order[other] < low[index]:
+                        low[index] = order[other]
+                else:
+                    calls.pop()
+                    if calls and low[index] < low[calls[-1][0]]:
+                        low[calls[-1][0]] = low[index]
+                    if low[index] == order[index]:
+                        # index is the first room of its component, the rooms above it on the stack are the rest
+                        while True:
+                            other = stack.pop()
+                            on_stack[other] = 0
+                            labels[other] = count
+                            if other == index:
+                                break
+                        count += 1
+
+        moves = set()
+        for index in range(n):
+            label = labels[index]
+            for edge in range(offsets[index], offsets[index + 1]):
+                other = labels[targets[edge]]
+                if other != label:
+                    moves.add((label, other))
+        dag_offsets = array('q', bytes(8 * (count + 1)))
+        dag_targets = array('i')
+        for label, other in sorted(moves):
+            dag_offsets[label + 1] += 1
+            dag_targets.append(other)
+        for label in range(count):
+            dag_offsets[label + 1] += dag_offsets[label]
+        return Components(labels, count, dag_offsets, dag_targets)
+
+    def save(self, file_name, source):
+        """
+        Writes the components to file_name, failing to write is not an error
+        :param source: (size, modification time in ns) of the maze file, see maze_cache.source_stamp
+        :return: True if the file was written, False otherwise
+        """
+        try:
+            tmp_name = temp_name(file_name)
+            with open(tmp_name, "wb") as f:
+                f.write(HEADER.pack(MAGIC, len(self.labels), self.count, len(self.dag_targets), *source))
+                self.labels.tofile(f)
+                self.dag_offsets.tofile(f)
+                self.dag_targets.tofile(f)
+            os.replace(tmp_name, file_name)
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def load(file_name, size, source):
+        """
+        Reads components written by save
+        :param size: The number of rooms of the maze
+        :param source: (size, modification time in ns) the maze file must have had when the file was written
+        :return: Components, None if the file can not be used
+        """
+        try:
+            with open(file_name, "rb") as f:
+                magic, stored_size, count, moves, *stored_source = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or stored_size != size or tuple(stored_source) != source:
+                    return None
+                labels = array('i')
+                labels.fromfile(f, size)
+                dag_offsets = array('q')
+                dag_offsets.fromfile(f, count + 1)
+                dag_targets = array('i')
+                dag_targets.fromfile(f, moves)
+        except (OSError, EOFError, struct.error):
+            return None
+        return Components(labels, count, dag_offsets, dag_targets)
+
+    def components_reaching(self, goal):
+        """
+        :param goal: The index of the goal room
+        :return: bytearray with a 1 for every component from which the goal room can be reached
+        """
+        target = self.labels[goal]
+        reaching = self.reaching.get(target)
+        if reaching is None:
+            reaching = bytearray(self.count)
+            reaching[target] = 1
+            offsets, targets = self.dag_offsets, self.dag_targets
+            # every move goes to a lower component, so the components below are done before they are needed
+            for label in range(target + 1, self.count):
+                for edge in range(offsets[label], offsets[label + 1]):
+                    if reaching[targets[edge]]:
+                        reaching[label] = 1
+                        break
+            self.reaching[target] = reaching
+        return reaching
+
+    def rooms_reaching(self, goal):
+        """
+        :param goal: The index of the goal room
+        :return: bytearray with a 1 for every room from which the goal room can be reached, the rooms a search
+                 for the goal can leave out are 0. None if the goal room can be reached from every room.
+        """
+        target = self.labels[goal]
+        if self.reaching_rooms is None or self.reaching_rooms[0] != target:
+            reaching = self.components_reaching(goal)
+            if all(reaching):
+                self.reaching_rooms = (target, None)
+            else:
+                self.reaching_rooms = (target, bytearray(map(reaching.__getitem__, self.labels)))
+        return self.reaching_rooms[1]
+
+    def reaches(self, start, goal):
+        """
+        :param start: The index of the start room
+        :param goal: The index of the goal room
+        :return: True if there is a path from the start room to the goal room, False otherwise
+        """
+        label = self.labels[start]
+        target = self.labels[goal]
+        if label == target:
+            return True
+        if label < target:
+            return False
+        return self.components_reaching(goal)[label] == 1
+
+
+def components_name(file_name):
+    """
+    :return: The name of the components file that belongs to a maze file
+    """
+    return os.path.splitext(file_name)[0] + ".scc"
+
+
+def get_components(maze):
+    """
+    Returns the components of a maze: from the maze object if they were used before, else from the .scc file
+    if it was made from the maze file as it is now, else they are computed and written to the .scc file.
+    A maze changed by set_connection is no longer the maze file, its components are only kept in memory.
+    :param maze: The maze
+    :return: Components
+    """
+    if maze.components is not None:
+        return maze.components
+    name = components_name(maze.file_name)
+    source = cache_source(maze)
+    components = None if source is None else Components.load(name, maze.get_size(), source)
+    if components is None:
+        components = Components.compute(maze)
+        if source is not None:
+            components.save(name, source)
+    maze.components = components
+    return components
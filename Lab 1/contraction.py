@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Reduced graph of a maze for the searches, stored per maze file in a .ctr file next to it.
+
+- Dead ends: a room that is connected both ways to a single other room (or to none) is left out, except for
+  the start and goal room, and so is every room that becomes such a dead end; this removes whole dead-end
+  branches. A path never needs to go into a dead end, it would have to come back the same way.
+- Corridors: a room that is connected both ways to exactly two other rooms is not a node of the graph, the
+  chain of corridor rooms between two other rooms becomes one move with the summed cost.
+
+The other rooms (junctions, rooms with one-way stairs, the start and goal rooms) are the nodes of the
+graph. A path over the nodes is turned back into a path of rooms with expand_path. Only UCS and ASTAR search
+the graph: an edge can stand for many moves, which BFS, DFS and GREEDY would take as a single move.
+
+usage: python3 contraction.py file.maze
+"""
+import os
+import struct
+import sys
+from array import array
+from maze_cache import cache_source, temp_name
+
+MAGIC = b"MAZECTR2"
+HEADER = struct.Struct("=8s8q")
+
+
+class Contraction:
+    """The nodes of the reduced graph and the corridors between them"""
+
+    def __init__(self, size, start, goal, nodes, edge_offsets, edge_targets, edge_costs, chain_offsets,
+                 chain_rooms):
+        """
+        :param size: The number of rooms of the maze
+        :param start: The index of the start room the graph was made for
+        :param goal: The index of the goal room the graph was made for
+        :param nodes: Array with the room indices of the nodes
+        :param edge_offsets: CSR offsets of the moves: the moves of node i are the edges
+                             edge_offsets[i] to edge_offsets[i + 1]
+        :param edge_targets: The room index of the node every move ends in
+        :param edge_costs: The cost of every move
+        :param chain_offsets: The corridor rooms of edge e are chain_rooms[chain_offsets[e]:chain_offsets[e + 1]]
+        :param chain_rooms: The corridor rooms of all moves, in the order they are passed
+        """
+        self.size = size
+        self.start = start
+        self.goal = goal
+        self.nodes = nodes
+        self.edge_offsets = edge_offsets
+        self.edge_targets = edge_targets
+        self.edge_costs = edge_costs
+        self.chain_offsets = chain_offsets
+        self.chain_rooms = chain_rooms
+        self.moves = {}     # room index of a node -> list of (room index of a node, cost)
+        self.chains = {}    # (from room, to room) -> edge
+        for i, node in enumerate(nodes):
+            moves = []
+            for edge in range(edge_offsets[i], edge_offsets[i + 1]):
+                moves.append((edge_targets[edge], edge_costs[edge]))
+                self.chains[(node, edge_targets[edge])] = edge
+            self.moves[node] = moves
+
+    @staticmethod
+    def compute(maze):
+        """
+        Removes the dead ends and contracts the corridors of a maze
+        :param maze: The maze
+        :return: Contraction
+        """
+        grid = maze.grid
+        grid.update_adjacency()
+        if grid.reverse_offsets is None:
+            grid.build_reverse_adjacency()
+        offsets, targets, costs = grid.adjacency_offsets, grid.adjacency_targets, grid.adjacency_costs
+        reverse_offsets, sources = grid.reverse_offsets, grid.reverse_sources
+        start = maze.get_index(maze.get_start())
+        goal = maze.get_index(maze.get_goal())
+        n = grid.size
+
+        # only rooms whose connections all go both ways can be a dead end or a corridor
+        two_way = bytearray(n)
+        degree = array('q', bytes(8 * n))   # the number of connected rooms that are not removed
+        for index in range(n):
+            begin, end = offsets[index], offsets[index + 1]
+            degree[index] = end - begin
+            if set(targets[begin:end]) == set(sources[reverse_offsets[index]:reverse_offsets[index + 1]]):
+                two_way[index] = 1
+        for index in grid.starts + grid.goals:
+            two_way[index] = 0
+
+        removed = bytearray(n)
+        stack = [index for index in range(n) if two_way[index] and degree[index] <= 1]
+        while stack:
+            index = stack.pop()
+            removed[index] = 1
+            for edge in range(offsets[index], offsets[index + 1]):
+                other = targets[edge]
+                if not removed[other]:
+                    degree[other] -= 1
+                    if degree[other] == 1 and two_way[other]:
+                        stack.append(other)
+
+        def is_corridor(index):
+            return two_way[index] and degree[index] == 2
+
+        nodes = array('q', (index for index in range(n) if not removed[index] and not is_corridor(index)))
+        edge_offsets = array('q', [0])
+        edge_targets, edge_costs = array('q'), array('q')
+        chain_offsets, chain_rooms = array('q', [0]), array('q')
+        for node in nodes:
+            # the cheapest corridor to every node that can be reached from this node
+            best = {}
+            for edge in range(offsets[node], offsets[node + 1]):
+                index = targets[edge]
+                if removed[index]:
+                    continue
+                cost = costs[edge]
+                previous = node
+                rooms = []
+                while is_corridor(index):
+                    rooms.append(index)
+                    for step in range(offsets[index], offsets[index + 1]):
+                        other = targets[step]
+                        if other != previous and not removed[other]:
+                            break
+                    cost += costs[step]
+                    previous, index = index, other
+                if index != node and (index not in best or cost < best[index][0]):
+                    best[index] = (cost, rooms)
+            for index, (cost, rooms) in best.items():
+                edge_targets.append(index)
+                edge_costs.append(cost)
+                chain_rooms.extend(rooms)
+                chain_offsets.append(len(chain_rooms))
+            edge_offsets.append(len(edge_targets))
+        return Contraction(n, start, goal, nodes, edge_offsets, edge_targets, edge_costs, chain_offsets, chain_rooms)
+
+    def save(self, file_name, source):
+        """
+        Writes the graph to file_name, failing to write is not an error
+        :param source: (size, modification time in ns) of the maze file, see maze_cache.source_stamp
+        :return: True if the file was written, False otherwise
+        """
+        try:
+            tmp_name = temp_name(file_name)
+            with open(tmp_name, "wb") as f:
+                f.write(HEADER.pack(MAGIC, self.size, self.start, self.goal, len(self.nodes),
+                                    len(self.edge_targets), len(self.chain_rooms), *source))
+                for values in (self.nodes, self.edge_offsets, self.edge_targets, self.edge_costs,
+                               self.chain_offsets, self.chain_rooms):
+                    values.tofile(f)
+            os.replace(tmp_name, file_name)
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def load(file_name, maze, source):
+        """
+        Reads a graph written by save
+        :param maze: The maze the graph belongs to
+        :param source: (size, modification time in ns) the maze file must have had when the file was written
+        :return: Contraction, None if the file can not be used
+        """
+        start = maze.get_index(maze.get_start())
+        goal = maze.get_index(maze.get_goal())
+        try:
+            with open(file_name, "rb") as f:
+                fields = HEADER.unpack(f.read(HEADER.size))
+                magic, size, stored_start, stored_goal, nodes, edges, rooms = fields[:7]
+                if magic != MAGIC or size != maze.get_size() or (stored_start, stored_goal) != (start, goal):
+                    return None
+                if fields[7:] != source:
+                    return None
+                tables = []
+                for count in (nodes, nodes + 1, edges, edges, edges + 1, rooms):
+                    values = array('q')
+                    values.fromfile(f, count)
+                    tables.append(values)
+        except (OSError, EOFError, struct.error):
+            return None
+        return Contraction(size, start, goal, *tables)
+
+    def covers(self, *rooms):
+        """
+        :param rooms: The indices of the start and goal room(s) of a search
+        :return: True if all rooms are nodes, so a path between them can be searched in the reduced graph
+        """
+        return all(index in self.moves for index in rooms)
+
+    def neighbors(self, index):
+        """
+        :param index: The room index of a node
+        :return: List of (room index of a node, cost) pairs of the moves of the node, like Maze.neighbors
+        """
+        return self.moves[index]
+
+    def expand_path(self, path):
+        """
+        :param path: List of the room indices of the nodes on a path
+        :return: List of the room indices of all rooms on the path
+        """
+        rooms = path[:1]
+        for previous, index in zip(path, path[1:]):
+            edge = self.chains[(previous, index)]
+            rooms.extend(self.chain_rooms[self.chain_offsets[edge]:self.chain_offsets[edge + 1]])
+            rooms.append(index)
+        return rooms
+
+
+def contraction_name(file_name):
+    """
+    :return: The name of the reduced graph file that belongs to a maze file
+    """
+    return os.path.splitext(file_name)[0] + ".ctr"
+
+
+def get_contraction(maze):
+    """
+    Returns the reduced graph of a maze: from the maze object if it was used before, else from the .ctr file
+    if it was made from the maze file as it is now, else it is computed and written to the .ctr file.
+    A maze changed by set_connection is no longer the maze file, its reduced graph is only kept in memory.
+    :param maze: The maze
+    :return: Contraction
+    """
+    if maze.contraction is not None:
+        return maze.contraction
+    name = contraction_name(maze.file_name)
+    source = cache_source(maze)
+    contraction = None if source is None else Contraction.load(name, maze, source)
+    if contraction is None:
+        contraction = Contraction.compute(maze)
+        if source is not None:
+            contraction.save(name, source)
+    maze.contraction = contraction
+    return contraction
+
+
+if __name__ == "__main__":
+    from maze import Maze
+    if len(sys.argv) != 2:
+        print("Usage: python3 contraction.py file.maze")
+        exit(-1)
+    maze = Maze(sys.argv[1], compact=True)
+    contraction = get_contraction(maze)
+    print("%d rooms, %d nodes, %d moves" % (maze.get_size(), len(contraction.nodes), len(contraction.edge_targets)))
@@ -1,10 +1,93 @@
 #!/usr/bin/env python3
+import heapq
 import queue
 import sys
+from collections import deque
+from functools import partial
+
+
+class IndexedHeap(object):
+    """
+    heapq priority queue that holds every key at most once and supports decrease-key.
+    A lowered priority pushes a new entry and the old one is skipped when it comes out (lazy deletion),
+    so all the sifting stays in the C code of heapq.
+    Items with the same priority are returned in insertion order.
+    """
+
+    def __init__(self, key):
+        """
+        :param key: Function that maps an item to its key (e.g. the index of its room)
+        """
+        self.key = key
+        self.heap = []          # entries (priority, sequence number, key, item), some of them stale
+        self.live = {}          # key -> its entry in heap that is not stale
+        self.sequence = 0
+
+    def __len__(self):
+        return len(self.live)
+
+    def __contains__(self, key):
+        return key in self.live
+
+    def put(self, entry):
+        """
+        Inserts the item, or lowers its priority if its key is already in the heap.
+        A higher priority for a key that is already in the heap is ignored.
+        :param entry: Tuple (priority, item)
+        """
+        priority, item = entry
+        key = self.key(item)
+        old = self.live.get(key)
+        if old is not None and priority >= old[0]:
+            return
+        self.sequence += 1
+        entry = (priority, self.sequence, key, item)
+        self.live[key] = entry
+        heapq.heappush(self.heap, entry)
+        if old is not None and len(self.heap) > 2 * len(self.live) + 64:
+            self.compact()
+
+    def get(self):
+        """
+        :return: Tuple (priority, item) with the lowest priority, removed from the heap
+        """
+        heap = self.heap
+        live = self.live
+        while True:
+            entry = heapq.heappop(heap)
+            if live.get(entry[2]) is entry:
+                del live[entry[2]]
+                return entry[0], entry[3]
+
+    def remove(self, key):
+        """
+        Removes the entry of a key from the heap
+        :param key: The key of the item to remove
+        :return: True if the key was in the heap, False otherwise
+        """
+        if self.live.pop(key, None) is None:
+            return False
+        if len(self.heap) > 2 * len(self.live) + 64:
+            self.compact()
+        return True
+
+    def compact(self):
+        """
+        Drops the stale entries once they outnumber the live ones, so the heap stays O(len(self))
+        """
+        self.heap = list(self.live.values())
+        heapq.heapify(self.heap)
+
+
+def room_index(state):
+    """
+    :return: The index of the room of a state, the key of the INDEXED fringe
+    """
+    return state.get_room().get_index()
 
 
 class Fringe(object):
-    """wrapper for queue lib from python to keep track of some statistics"""
+    """wrapper for queue lib (or deque/heapq when thread safety is not needed) from python to keep track of some statistics"""
 
     # ### DO NOT CHANGE __MAX_FRINGE_SIZE ###
     __MAX_FRINGE_SIZE = 50000
@@ -28,42 +111,116 @@ class Fringe(object):
         if fringe_type == "PRIORITY":
             return queue.PriorityQueue(self.__MAX_FRINGE_SIZE)
 
-    def __init__(self, fringe_type='FIFO'):
+    def create_fast_fringe(self, fringe_type):
+        """
+        Creates a single threaded fringe of type fringe_type, without the locking of the queue lib
+        :param fringe_type: The desired type for the queue
+        :return: A deque (STACK, FIFO) or a list used as heap (PRIORITY)
+        """
+        if fringe_type == "STACK" or fringe_type == "FIFO":
+            return deque()
+
+        if fringe_type == "PRIORITY":
+            return []
+
+        if fringe_type == "INDEXED":
+            return IndexedHeap(self.__key)
+
+    def __init__(self, fringe_type='FIFO', backend='FAST', key=room_index):
+        """
+        :param fringe_type: STACK, FIFO, PRIORITY or INDEXED (priority queue holding every room at most once,
+                            pushing a room again only lowers its priority)
+        :param backend: FAST for the single threaded deque/heapq fringe,
+                        THREADSAFE for the synchronised fringe of the queue lib (not available for INDEXED)
+        :param key: Function mapping an item to its key in an INDEXED fringe, by default the index of the room of a state
+        """
         self.__type = fringe_type
+        self.__backend = backend
+        self.__key = key
         super(Fringe, self).__init__()
-        self.__fringe = self.create_fringe(self.__type)
+        if backend == "THREADSAFE" and fringe_type != "INDEXED":
+            self.__fringe = self.create_fringe(self.__type)
+            self.__put = partial(self.__fringe.put, block=False)
+            self.__get = self.__fringe.get
+            self.__size = self.__fringe.qsize
+        else:
+            self.__fringe = self.create_fast_fringe(self.__type)
+            self.__size = self.__fringe.__len__
+            if fringe_type == "PRIORITY":
+                self.__put = partial(heapq.heappush, self.__fringe)
+                self.__get = partial(heapq.heappop, self.__fringe)
+            elif fringe_type == "INDEXED":
+                self.__put = self.__fringe.put
+                self.__get = self.__fringe.get
+            else:
+                self.__put = self.__fringe.append
+                self.__get = self.__fringe.popleft if fringe_type == "FIFO" else self.__fringe.pop
 
     def push(self, item, cost=0):
         """
-        puts the item in the fringe
+        puts the item in the fringe. In an INDEXED fringe, pushing an item whose key is already in it only lowers
+        its priority: that is no insertion and is possible when the fringe is full.
         :param item: item to put in the fringe
         """
-        # If the fringe is full, print an error and exit
-        if self.__fringe.full():
+        size = self.__size()
+        # If the fringe is full and the item would be added, print an error and exit
+        if size >= self.__MAX_FRINGE_SIZE and (self.__type != "INDEXED" or self.__key(item) not in self.__fringe):
             print("Error: trying to apply push on an fringe that already contains MAX ("
                   + str(self.__MAX_FRINGE_SIZE) + ") elements")
             self.print_stats()
             sys.exit(1)
-        self.__fringe.put((cost, item), block=False)
-        if self.__fringe.qsize() > self.__maxSize:
-            self.__maxSize = self.__fringe.qsize()
-        self.__insertions += 1
-        
+        self.__put((cost, item))
+        new_size = self.__size()
+        if new_size > size:
+            self.__insertions += 1
+            if new_size > self.__maxSize:
+                self.__maxSize = new_size
 
     def pop(self):
         """
         :return: item from fringe, None if the fringe is empty
         """
-        if self.__fringe.empty():
+        if not self.__size():
             return None
         self.__deletions += 1
-        return self.__fringe.get()
+        return self.__get()
+
+    def remove(self, key):
+        """
+        Removes an item from an INDEXED fringe
+        :param key: The key of the item, see the key function of the fringe
+        :return: True if the item was in the fringe, False otherwise
+        """
+        if self.__type != "INDEXED":
+            raise ValueError("Only items of an INDEXED fringe can be removed")
+        if not self.__fringe.remove(key):
+            return False
+        self.__deletions += 1
+        return True
 
     def is_empty(self):
         """
         :return: True if fringe is empty, false otherwise
         """
-        return self.__fringe.empty()
+        return not self.__size()
+
+    def get_size(self):
+        """
+        :return: The number of items in the fringe
+        """
+        return self.__size()
+
+    def get_capacity(self):
+        """
+        :return: The number of items the fringe can hold, pushing more stops the program
+        """
+        return self.__MAX_FRINGE_SIZE
+
+    def get_max_size(self):
+        """
+        :return: The maximum number of items that were in the fringe at the same time
+        """
+        return self.__maxSize
 
     # returns the number of insertions
     def get_insertions(self):
@@ -81,7 +238,7 @@ class Fringe(object):
     def print_stats(self):
         """ Prints the statistics of the fringe """
         print("#### fringe statistics:")
-        print("size: {0:>15d}".format(self.__fringe.qsize()))
+        print("size: {0:>15d}".format(self.__size()))
         print("maximum size: {0:>7d}".format(self.__maxSize))
         print("insertions: {0:>9d}".format(self.get_insertions()))
         print("deletions: {0:>10d}".format(self.get_deletions()))
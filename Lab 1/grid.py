@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+from array import array
+from itertools import accumulate, compress
+
+# order: UP, DOWN, NORTH, SOUTH, EAST, WEST (same as Room.connections)
+DIRECTIONS = ("UP", "DOWN", "NORTH", "SOUTH", "EAST", "WEST")
+DIRECTION_BITS = {d: 1 << i for i, d in enumerate(DIRECTIONS)}
+NO_HEURISTIC = -32768
+# per connection mask: the number of connections, the directions (as numbers) of the connections, and
+# six bytes with a 1 for every connected direction (to select the costs of the connections)
+CONNECTION_COUNT = bytes(bin(mask).count("1") for mask in range(256))
+MASK_DIRECTIONS = tuple(tuple(d for d in range(6) if mask & (1 << d)) for mask in range(64))
+MASK_SELECTORS = tuple(bytes(1 if mask & (1 << d) else 0 for d in range(6)) for mask in range(64))
+
+
+class MazeGrid:
+    """
+    Compact storage of a maze: every room is addressed by a single integer index
+    and is stored as a 6-bit connection mask, six step costs and a heuristic value
+    """
+
+    def __init__(self, width, height, floors, allocate=True):
+        """
+        :param allocate: If False, the storage is not allocated and has to be assigned by the caller
+        """
+        self.width = width
+        self.height = height
+        self.floors = floors
+        self.size = width * height * floors
+        self.masks = bytearray(self.size) if allocate else None
+        self.costs = array('B', bytes(6 * self.size)) if allocate else None
+        self.heuristics = array('h', [NO_HEURISTIC]) * self.size if allocate else None
+        self.start = None
+        self.goal = None
+        # every start (X) and goal (G) room in the order of the file, start and goal are the last of them
+        self.starts = []
+        self.goals = []
+        # index offset of a move in each direction, order as DIRECTIONS
+        self.offsets = (width * height, -width * height, -width, width, 1, -1)
+        # CSR adjacency: the neighbors of room i are targets[offsets[i]:offsets[i + 1]]
+        self.adjacency_offsets = None
+        self.adjacency_targets = None
+        self.adjacency_costs = None
+        # reverse CSR adjacency, built on demand: the rooms from which room i can be reached
+        self.reverse_offsets = None
+        self.reverse_sources = None
+        self.reverse_costs = None
+        # rows of the rooms whose connections changed since the tables were built, they are used instead of the
+        # rows in the tables: room index -> list of (neighbor index, cost), and the same for the predecessors
+        self.changed_rows = {}
+        self.changed_reverse_rows = {}
+        # (size in bytes, modification time in ns) of the maze file the grid was read from, None if unknown, and
+        # whether set_connection changed the grid since: then the caches of the maze file do not belong to it
+        self.source = None
+        self.mutated = False
+
+    def get_index(self, coords):
+        """
+        :param coords: The coordinates (x, y, z) of a room
+        :return: The index of the room
+        """
+        x, y, z = coords
+        return (z * self.height + y) * self.width + x
+
+    def get_coords(self, index):
+        """
+        :param index: The index of a room
+        :return: The coordinates (x, y, z) of the room
+        """
+        index, x = divmod(index, self.width)
+        z, y = divmod(index, self.height)
+        return x, y, z
+
+    def add_connection(self, index, direction, cost):
+        """
+        Opens the connection of a room in the given direction
+        :param index: The index of the room
+        :param direction: The direction of the connection
+        :param cost: The cost of moving in that direction
+        """
+        d = DIRECTIONS.index(direction)
+        self.masks[index] |= 1 << d
+        self.costs[6 * index + d] = cost
+
+    def set_connection(self, index, direction, cost=None):
+        """
+        Changes a connection after the adjacency table is built. The tables are not built again: the new rows of
+        the two rooms the connection is between are kept aside and neighbors and predecessors look there first,
+        until update_adjacency builds the tables again. The grid is marked as mutated.
+        :param index: The index of the room
+        :param direction: The direction of the connection
+        :param cost: The new cost of the move, None closes the connection
+        """
+        d = DIRECTIONS.index(direction)
+        bit = 1 << d
+        self.mutated = True
+        if cost is None:
+            self.masks[index] &= ~bit & 0xFF
+            self.costs[6 * index + d] = 0
+        else:
+            self.masks[index] |= bit
+            self.costs[6 * index + d] = cost
+        if self.adjacency_offsets is None:
+            return
+        self.changed_rows[index] = self.room_moves(index)
+        target = index + self.offsets[d]
+        self.changed_reverse_rows[target] = self.room_predecessors(target)
+
+    def room_moves(self, index):
+        """
+        :return: List of (neighbor index, step cost) pairs of a room, read from its connection mask
+        """
+        base = 6 * index
+        return [(index + self.offsets[d], self.costs[base + d]) for d in MASK_DIRECTIONS[self.masks[index]]]
+
+    def room_predecessors(self, index):
+        """
+        :return: List of (predecessor index, step cost) pairs of a room, read from the connection masks of the
+                 rooms around it, in the order of the reverse table
+        """
+        moves = []
+        for d in range(6):
+            other = index - self.offsets[d]
+            if 0 <= other < self.size and self.masks[other] & (1 << d):
+                moves.append((other, self.costs[6 * other + d]))
+        moves.sort()
+        return moves
+
+    def update_adjacency(self):
+        """
+        Builds the adjacency table if it is not built or if connections changed since it was built, for the
+        code that reads the tables directly instead of using neighbors
+        """
+        if self.adjacency_offsets is None or self.changed_rows:
+            self.build_adjacency()
+
+    def can_move_to(self, index, direction):
+        """
+        :return: True if the room with the given index has a connection in direction, False otherwise
+        """
+        return self.masks[index] & DIRECTION_BITS[direction] != 0
+
+    def get_connections(self, index):
+        """
+        :return: List of the directions in which the room with the given index is connected
+        """
+        mask = self.masks[index]
+        return [d for i, d in enumerate(DIRECTIONS) if mask & (1 << i)]
+
+    def get_costs(self, index):
+        """
+        :return: Dict mapping each connected direction of the room to the cost of that move
+        """
+        mask = self.masks[index]
+        base = 6 * index
+        return {d: self.costs[base + i] for i, d in enumerate(DIRECTIONS) if mask & (1 << i)}
+
+    def get_heuristic(self, index):
+        """
+        :return: The heuristic value stored in the room, None if there is none
+        """
+        value = self.heuristics[index]
+        return None if value == NO_HEURISTIC else value
+
+    def set_heuristic(self, index, value):
+        """
+        Stores the heuristic value of a room, None clears it
+        """
+        self.heuristics[index] = NO_HEURISTIC if value is None else value
+
+    def get_neighbor(self, index, direction):
+        """
+        :return: The index of the room reached by moving in direction, no check is done on the connection
+        """
+        return index + self.offsets[DIRECTIONS.index(direction)]
+
+    def build_adjacency(self):
+        """
+        Builds the CSR adjacency table of (neighbor index, step cost) pairs from the connection masks.
+        Room indices fit in 32 bits, the tables are built per mask with lookup tables instead of per bit.
+        """
+        masks = bytes(self.masks)
+        offsets = array('i', [0])
+        offsets.extend(accumulate(masks.translate(CONNECTION_COUNT)))
+        deltas = [tuple(self.offsets[d] for d in directions) for directions in MASK_DIRECTIONS]
+        targets = array('i', [index + delta for index, mask in enumerate(masks) if mask for delta in deltas[mask]])
+        selected = b"".join(map(MASK_SELECTORS.__getitem__, masks))
+        costs = array('B', bytes(compress(bytes(self.costs), selected)))
+        self.adjacency_offsets = offsets
+        self.adjacency_targets = targets
+        self.adjacency_costs = costs
+        # the reverse table is built again when it is used
+        self.reverse_offsets = self.reverse_sources = self.reverse_costs = None
+        self.changed_rows.clear()
+        self.changed_reverse_rows.clear()
+
+    def neighbors(self, index):
+        """
+        :param index: The index of a room
+        :return: List of (neighbor index, step cost) pairs of the room
+        """
+        if self.changed_rows and index in self.changed_rows:
+            return list(self.changed_rows[index])
+        begin = self.adjacency_offsets[index]
+        end = self.adjacency_offsets[index + 1]
+        return list(zip(self.adjacency_targets[begin:end], self.adjacency_costs[begin:end]))
+
+    def build_reverse_adjacency(self):
+        """
+        Builds the CSR table of (predecessor index, step cost) pairs by reversing the adjacency table
+        """
+        offsets = array('i', bytes(4 * (self.size + 1)))
+        for target in self.adjacency_targets:
+            offsets[target + 1] += 1
+        for index in range(self.size):
+            offsets[index + 1] += offsets[index]
+        edges = len(self.adjacency_targets)
+        sources = array('i', bytes(4 * edges))
+        costs = array('B', bytes(edges))
+        fill = array('i', offsets[:self.size])
+        for index in range(self.size):
+            for edge in range(self.adjacency_offsets[index], self.adjacency_offsets[index + 1]):
+                target = self.adjacency_targets[edge]
+                sources[fill[target]] = index
+                costs[fill[target]] = self.adjacency_costs[edge]
+                fill[target] += 1
+        self.reverse_offsets = offsets
+        self.reverse_sources = sources
+        self.reverse_costs = costs
+
+    def predecessors(self, index):
+        """
+        :param index: The index of a room
+        :return: List of (predecessor index, step cost) pairs: the rooms from which the room can be
+                 reached in one move and the cost of that move
+        """
+        if self.changed_reverse_rows and index in self.changed_reverse_rows:
+            return list(self.changed_reverse_rows[index])
+        if self.reverse_offsets is None:
+            self.build_reverse_adjacency()
+        begin = self.reverse_offsets[index]
+        end = self.reverse_offsets[index + 1]
+        return list(zip(self.reverse_sources[begin:end], self.reverse_costs[begin:end]))
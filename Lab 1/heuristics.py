@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+
+def heuristic(room, goal):
+    """
+    Returns heuristic value between a room and the goal room
+    :param room: current room
+    :param goal: goal room
+    :return: int
+    """
+    return heuristic_coords(room.get_coords(), goal.get_coords())
+
+
+def heuristic_coords(room_coords, goal_coords):
+    """
+    Returns heuristic value between the coordinates of a room and those of the goal room
+    :param room_coords: coordinates (x, y, z) of the current room
+    :param goal_coords: coordinates (x, y, z) of the goal room
+    :return: int
+    """
+    return abs(room_coords[0] - goal_coords[0]) + abs(room_coords[1] - goal_coords[1])
+
+
+# names of the heuristics that can be given to the informed searches
+HEURISTICS = ("MANHATTAN", "FLOOR", "ALT")
+
+
+def min_move_costs(maze):
+    """
+    Computes the lowest cost of a move within a floor, of a move up and of a move down in the maze
+    :param maze: The maze
+    :return: (horizontal, up, down), 0 for a kind of move that does not exist
+    """
+    grid = maze.grid
+    n = grid.size
+    lowest = []
+    for d in range(6):
+        # rooms without the connection get cost 255, so only real connections count for the minimum
+        bit = 1 << d
+        no_connection = bytes(0 if mask & bit else 255 for mask in range(256))
+        costs = int.from_bytes(bytes(grid.costs[d::6]), "little")
+        missing = int.from_bytes(bytes(grid.masks).translate(no_connection), "little")
+        lowest.append(min((costs | missing).to_bytes(n, "little"), default=255))
+    # order: UP, DOWN, NORTH, SOUTH, EAST, WEST
+    horizontal, up, down = min(lowest[2:]), lowest[0], lowest[1]
+    return tuple(0 if cost == 255 else cost for cost in (horizontal, up, down))
+
+
+def make_heuristic(maze, name="MANHATTAN", target=None, reverse=False):
+    """
+    Creates a heuristic function on room indices
+    :param maze: The maze
+    :param name: MANHATTAN (x and y only, as heuristic()), FLOOR (also counts the moves up or down, with
+                 the lowest move costs of the maze) or ALT (FLOOR combined with landmark bounds)
+    :param target: The index of the room the heuristic estimates the cost to, by default the goal room
+    :param reverse: If True, the heuristic estimates the cost from target to the room instead (backward search)
+    :return: Function mapping a room index to an estimate of the remaining cost
+    """
+    if target is None:
+        target = maze.get_index(maze.get_goal())
+    target_coords = maze.get_coords(target)
+    get_coords = maze.get_coords
+
+    if name == "MANHATTAN":
+        return lambda index: heuristic_coords(get_coords(index), target_coords)
+
+    horizontal, up, down = min_move_costs(maze)
+
+    def floor_heuristic(index):
+        x, y, z = get_coords(index)
+        floors = target_coords[2] - z if not reverse else z - target_coords[2]
+        vertical = floors * up if floors > 0 else -floors * down
+        return horizontal * (abs(x - target_coords[0]) + abs(y - target_coords[1])) + vertical
+
+    if name == "FLOOR":
+        return floor_heuristic
+
+    if name == "ALT":
+        from landmarks import get_landmarks
+        landmarks = get_landmarks(maze)
+        # per landmark: (cost from landmark, cost to landmark, the same two for the target)
+        tables = [(f, t, f[target], t[target]) for f, t in zip(landmarks.from_landmark, landmarks.to_landmark)]
+
+        def alt_heuristic(index):
+            best = floor_heuristic(index)
+            for from_landmark, to_landmark, target_from, target_to in tables:
+                room_from = from_landmark[index]
+                room_to = to_landmark[index]
+                if not reverse:
+                    # d(room, target) >= d(L, target) - d(L, room) and >= d(room, L) - d(target, L)
+                    if target_from >= 0 and room_from >= 0 and target_from - room_from > best:
+                        best = target_from - room_from
+                    if room_to >= 0 and target_to >= 0 and room_to - target_to > best:
+                        best = room_to - target_to
+                else:
+                    # d(target, room) >= d(L, room) - d(L, target) and >= d(target, L) - d(room, L)
+                    if room_from >= 0 and target_from >= 0 and room_from - target_from > best:
+                        best = room_from - target_from
+                    if target_to >= 0 and room_to >= 0 and target_to - room_to > best:
+                        best = target_to - room_to
+            return best
+
+        return alt_heuristic
+
+    raise ValueError("Unknown heuristic: " + str(name))
+
+
+def make_nearest_heuristic(maze, name="MANHATTAN", targets=None):
+    """
+    Creates a heuristic on room indices to the nearest of several rooms: the lowest estimate over the targets,
+    which never overestimates (and is consistent) when the heuristic of every single target is
+    :param maze: The maze
+    :param name: The heuristic to every target, see make_heuristic
+    :param targets: List of the indices of the rooms, by default the goal rooms of the maze
+    :return: Function mapping a room index to an estimate of the cost to the nearest target
+    """
+    if targets is None:
+        targets = [maze.get_index(coords) for coords in maze.get_goals()]
+    heuristics = [make_heuristic(maze, name, target) for target in targets]
+    if len(heuristics) == 1:
+        return heuristics[0]
+    return lambda index: min(h(index) for h in heuristics)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Hierarchical path finding (HPA*). Every floor is split in square clusters of rooms. The rooms with a move
+into another cluster (the entrances and the stairs) are the nodes of a small abstract graph, whose edges are
+these moves and the cheapest paths inside a cluster between its nodes. A query searches the abstract graph and
+then only finds the paths inside the clusters on the chosen route.
+
+Because every room with a move out of (or into) its cluster is a node, the path is as cheap as the cheapest
+path in the maze. The abstraction is stored in a .hpa file next to the maze file.
+
+usage: python3 hpa.py file.maze [--cluster-size=N]     builds and stores the abstraction of a maze
+"""
+import heapq
+import os
+import struct
+import sys
+from array import array
+from fringe import Fringe
+from state import State
+from heuristics import make_heuristic
+from maze_cache import cache_source, temp_name
+
+MAGIC = b"MAZEHPA2"
+HEADER = struct.Struct("=8s6q")
+DEFAULT_CLUSTER_SIZE = 10
+START = -1  # parent of the nodes that are reached from the start room
+
+
+class Abstraction:
+    """The abstract graph of a maze, the edges are stored as a CSR table over the node ids"""
+
+    def __init__(self, maze, cluster_size, nodes, edge_offsets, edge_targets, edge_costs):
+        """
+        :param maze: The maze the abstraction belongs to
+        :param cluster_size: The width and height of a cluster in rooms
+        :param nodes: The room index of every node
+        :param edge_offsets: The edges of node i are edge_targets[edge_offsets[i]:edge_offsets[i + 1]]
+        :param edge_targets: The node id an edge leads to
+        :param edge_costs: The cost of the cheapest path of an edge
+        """
+        self.maze = maze
+        self.cluster_size = cluster_size
+        self.nodes = nodes
+        self.edge_offsets = edge_offsets
+        self.edge_targets = edge_targets
+        self.edge_costs = edge_costs
+        self.node_of = {room: node for node, room in enumerate(nodes)}
+        # the cluster number of every room, row by row
+        grid = maze.grid
+        clusters_x = -(-grid.width // cluster_size)
+        clusters_y = -(-grid.height // cluster_size)
+        row = array('q', [x // cluster_size for x in range(grid.width)])
+        self.clusters = array('q')
+        for z in range(grid.floors):
+            for y in range(grid.height):
+                first = (z * clusters_y + y // cluster_size) * clusters_x
+                self.clusters.extend(first + cluster for cluster in row)
+
+    def get_cluster(self, index):
+        """
+        :param index: The index of a room
+        :return: The number of the cluster of the room
+        """
+        return self.clusters[index]
+
+    def cluster_dijkstra(self, source, reverse=False, target=None):
+        """
+        Cheapest paths from source to the rooms of its own cluster, without leaving the cluster
+        :param source: The index of the room to start from
+        :param reverse: If True, the connections are followed backwards, which gives the costs to reach source
+        :param target: If given, the search stops when the cost of this room is final
+        :return: (distances, parents): dicts of the rooms that were reached
+        """
+        clusters = self.clusters
+        cluster = clusters[source]
+        expand = self.maze.predecessors if reverse else self.maze.neighbors
+        distances = {source: 0}
+        parents = {source: None}
+        done = set()
+        heap = [(0, source)]
+        while heap:
+            distance, index = heapq.heappop(heap)
+            if index in done:
+                continue
+            done.add(index)
+            if index == target:
+                break
+            for new_index, step_cost in expand(index):
+                new_distance = distance + step_cost
+                if new_distance < distances.get(new_index, float("inf")) and clusters[new_index] == cluster:
+                    distances[new_index] = new_distance
+                    parents[new_index] = index
+                    heapq.heappush(heap, (new_distance, new_index))
+        return distances, parents
+
+    @staticmethod
+    def compute(maze, cluster_size=DEFAULT_CLUSTER_SIZE):
+        """
+        Finds the nodes of every cluster and the edges between them
+        :param maze: The maze to build the abstraction for
+        :param cluster_size: The width and height of a cluster in rooms
+        :return: Abstraction
+        """
+        abstraction = Abstraction(maze, cluster_size, [], None, None, None)
+        clusters = abstraction.clusters
+        # the moves between clusters, per room that is a node
+        crossings = {}
+        for index in range(maze.get_size()):
+            cluster = clusters[index]
+            for new_index, step_cost in maze.neighbors(index):
+                if clusters[new_index] != cluster:
+                    crossings.setdefault(index, []).append((new_index, step_cost))
+                    crossings.setdefault(new_index, [])
+        nodes = sorted(crossings)
+        node_of = {room: node for node, room in enumerate(nodes)}
+
+        edge_offsets = array('q', [0])
+        edge_targets = array('q')
+        edge_costs = array('q')
+        for room in nodes:
+            for new_index, step_cost in crossings[room]:
+                edge_targets.append(node_of[new_index])
+                edge_costs.append(step_cost)
+            distances, _ = abstraction.cluster_dijkstra(room)
+            for new_index, distance in distances.items():
+                if new_index != room and new_index in node_of:
+                    edge_targets.append(node_of[new_index])
+                    edge_costs.append(distance)
+            edge_offsets.append(len(edge_targets))
+        return Abstraction(maze, cluster_size, nodes, edge_offsets, edge_targets, edge_costs)
+
+    def save(self, file_name, source):
+        """
+        Writes the abstraction to file_name, failing to write is not an error
+        :param source: (size, modification time in ns) of the maze file, see maze_cache.source_stamp
+        :return: True if the file was written, False otherwise
+        """
+        try:
+            tmp_name = temp_name(file_name)
+            with open(tmp_name, "wb") as f:
+                f.write(HEADER.pack(MAGIC, self.cluster_size, self.maze.get_size(), len(self.nodes),
+                                    len(self.edge_targets), *source))
+                array('q', self.nodes).tofile(f)
+                self.edge_offsets.tofile(f)
+                self.edge_targets.tofile(f)
+                self.edge_costs.tofile(f)
+            os.replace(tmp_name, file_name)
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def load(file_name, maze, source, cluster_size=None):
+        """
+        Reads an abstraction written by save
+        :param maze: The maze the abstraction belongs to
+        :param source: (size, modification time in ns) the maze file must have had when the file was written
+        :param cluster_size: The cluster size the abstraction must have, None accepts any size
+        :return: Abstraction, None if the file can not be used
+        """
+        try:
+            with open(file_name, "rb") as f:
+                magic, stored_cluster_size, size, count, edges, *stored_source = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or size != maze.get_size() or cluster_size not in (None, stored_cluster_size):
+                    return None
+                if tuple(stored_source) != source:
+                    return None
+                tables = []
+                for length in (count, count + 1, edges, edges):
+                    values = array('q')
+                    values.fromfile(f, length)
+                    tables.append(values)
+        except (OSError, EOFError, struct.error):
+            return None
+        return Abstraction(maze, stored_cluster_size, list(tables[0]), *tables[1:])
+
+    def edges(self, node):
+        """
+        :param node: The id of a node
+        :return: List of (node id, cost) pairs of the edges of the node
+        """
+        begin = self.edge_offsets[node]
+        end = self.edge_offsets[node + 1]
+        return list(zip(self.edge_targets[begin:end], self.edge_costs[begin:end]))
+
+    def refine(self, start, goal, route, start_parents, goal_parents):
+        """
+        Turns a route over the abstract graph into a path of rooms
+        :param start: The index of the start room
+        :param goal: The index of the goal room
+        :param route: List of node ids from the first node after the start to the last node before the goal
+        :param start_parents: Parents of the cluster search from the start room
+        :param goal_parents: Parents of the backwards cluster search from the goal room
+        :return: List of room indices from start to goal
+        """
+        rooms = [self.nodes[node] for node in route]
+        path = []
+        index = rooms[0] if rooms else goal
+        while index is not None:
+            path.append(index)
+            index = start_parents[index]
+        path.reverse()
+        for previous, index in zip(rooms, rooms[1:]):
+            if self.get_cluster(previous) != self.get_cluster(index):
+                path.append(index)  # one move into the next cluster
+                continue
+            _, parents = self.cluster_dijkstra(previous, target=index)
+            part = []
+            while index != previous:
+                part.append(index)
+                index = parents[index]
+            path.extend(reversed(part))
+        if rooms:
+            index = goal_parents[rooms[-1]]
+            while index is not None:
+                path.append(index)
+                index = goal_parents[index]
+        return path
+
+
+def hpa_name(file_name):
+    """
+    :return: The name of the abstraction file that belongs to a maze file
+    """
+    return os.path.splitext(file_name)[0] + ".hpa"
+
+
+def get_abstraction(maze, cluster_size=None):
+    """
+    Returns the abstraction of a maze: from the maze object if it was used before, else from the .hpa file
+    if it was made from the maze file as it is now, else it is computed and written to the .hpa file.
+    A maze changed by set_connection is no longer the maze file, its abstraction is only kept in memory.
+    :param maze: The maze
+    :param cluster_size: The cluster size, None uses the stored abstraction or DEFAULT_CLUSTER_SIZE
+    :return: Abstraction
+    """
+    if maze.abstraction is not None and cluster_size in (None, maze.abstraction.cluster_size):
+        return maze.abstraction
+    name = hpa_name(maze.file_name)
+    source = cache_source(maze)
+    abstraction = None if source is None else Abstraction.load(name, maze, source, cluster_size)
+    if abstraction is None:
+        abstraction = Abstraction.compute(maze, cluster_size or DEFAULT_CLUSTER_SIZE)
+        if source is not None:
+            abstraction.save(name, source)
+    maze.abstraction = abstraction
+    return abstraction
+
+
+def hpa_star(maze, backend="FAST", heuristic_name="MANHATTAN", start=None, goal=None, stats=None, events=None):
+    """
+    A* over the abstract graph of the maze, the start and goal room are connected to the nodes of their cluster
+    :param maze: The maze to solve
+    :param backend: backend of the fringe, FAST or THREADSAFE
+    :param heuristic_name: The heuristic to use, see heuristics.make_heuristic
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param stats: SearchStats to count the expansions of the abstract nodes in, None to not count them
+    :param events: search_events.Events that gets the expansions of the abstract nodes, None to not make events
+    :return: Generator of event batches (see search_events.py) that returns
+             (state of the goal room or None if there is no path, fringe of the abstract search)
+    """
+    if start is None:
+        start = maze.get_index(maze.get_start())
+    if goal is None:
+        goal = maze.get_index(maze.get_goal())
+    abstraction = get_abstraction(maze)
+    nodes = abstraction.nodes
+    node_of = abstraction.node_of
+    h = make_heuristic(maze, heuristic_name, goal)
+    fringe_type = "PRIORITY" if backend == "THREADSAFE" else "INDEXED"
+    fr = Fringe(fringe_type, backend, key=int)
+    goal_node = len(nodes)  # the goal room is an extra node that is only in the fringe
+
+    start_distances, start_parents = abstraction.cluster_dijkstra(start)
+    goal_distances, goal_parents = abstraction.cluster_dijkstra(goal, reverse=True)
+    # node id -> cost from the start and previous node
+    costs = {}
+    parents = {}
+    if goal in start_distances:
+        costs[goal_node] = start_distances[goal]
+        parents[goal_node] = START
+        fr.push(goal_node, start_distances[goal])
+    for room, distance in start_distances.items():
+        if room in node_of and distance < costs.get(goal_node, float("inf")):
+            node = node_of[room]
+            costs[node] = distance
+            parents[node] = START
+            fr.push(node, distance + h(room))
+
+    while not fr.is_empty():
+        priority, node = fr.pop()
+        cost = costs[node]
+        if node == goal_node:
+            route = []
+            node = parents[node]
+            while node != START:
+                route.append(node)
+                node = parents[node]
+            route.reverse()
+            path = abstraction.refine(start, goal, route, start_parents, goal_parents)
+            return State.from_path(maze, path), fr
+        if priority > cost + h(nodes[node]):
+            if stats is not None:
+                stats.duplicates += 1
+            continue    # stale entry of the PRIORITY fringe
+        successors = abstraction.edges(node)
+        if nodes[node] in goal_distances:
+            successors.append((goal_node, goal_distances[nodes[node]]))
+        pushed = 0
+        for new_node, step_cost in successors:
+            new_cost = cost + step_cost
+            if new_cost < costs.get(new_node, float("inf")):
+                costs[new_node] = new_cost
+                parents[new_node] = node
+                fr.push(new_node, new_cost if new_node == goal_node else new_cost + h(nodes[new_node]))
+                pushed += 1
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += pushed
+            stats.duplicates += len(successors) - pushed
+        if events is not None and events.add(nodes[node], cost, priority, fr.get_size()):
+            yield events.take()
+    return None, fr
+
+
+if __name__ == "__main__":
+    from maze import Maze
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    cluster_size = DEFAULT_CLUSTER_SIZE
+    for option in sys.argv[1:]:
+        if option.startswith("--cluster-size="):
+            cluster_size = int(option.split("=", 1)[1])
+    if len(args) != 1:
+        print("Usage: python3 hpa.py file.maze [--cluster-size=N]")
+        exit(-1)
+    maze = Maze(args[0], compact=True)
+    abstraction = get_abstraction(maze, cluster_size)
+    print("Clusters of %dx%d rooms, %d nodes, %d edges" % (cluster_size, cluster_size, len(abstraction.nodes),
+                                                         len(abstraction.edge_targets)))
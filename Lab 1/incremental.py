@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Incremental replanning with Lifelong Planning A* (LPA*). The planner keeps its g and rhs values between
+searches, so when connections of the maze open, close or change cost, only the rooms whose cheapest path
+changed are expanded again instead of searching the whole maze once more.
+
+usage: python3 incremental.py file.maze changes.txt [--heuristic=NAME] [--one-way]
+
+Every line of the changes file is "x y z DIRECTION COST" (COST "-" closes the connection), the path is
+repaired after every line; empty lines and lines starting with # are skipped. Without --one-way the
+connection back is changed as well, like a door.
+"""
+import heapq
+import sys
+from array import array
+from grid import DIRECTIONS
+from state import State
+from heuristics import make_heuristic
+
+INFINITY = float("inf")
+# the direction opposite to each direction, order as DIRECTIONS
+OPPOSITE = (1, 0, 3, 2, 5, 4)
+# the heuristics that do not depend on the costs of the maze, so they stay valid when connections change
+PLANNER_HEURISTICS = ("MANHATTAN", "FLOOR")
+
+
+class LPAStar:
+    """Shortest path from a fixed start room to a fixed goal room that is repaired after changes"""
+
+    def __init__(self, maze, start=None, goal=None, heuristic_name="MANHATTAN"):
+        """
+        :param maze: The maze to plan in, it is changed with update
+        :param start: index of the start room, by default the start of the maze
+        :param goal: index of the goal room, by default the goal of the maze
+        :param heuristic_name: MANHATTAN or FLOOR, they stay admissible as long as no move gets cheaper than
+                               the cheapest move of the maze when the planner was made. ALT is not accepted:
+                               its landmark costs are those of the maze before the changes, and LPA* is only
+                               correct with a consistent heuristic.
+        """
+        if heuristic_name not in PLANNER_HEURISTICS:
+            raise ValueError("LPA* can not use the %s heuristic, only MANHATTAN or FLOOR" % heuristic_name)
+        self.maze = maze
+        self.grid = maze.grid
+        self.start = maze.get_index(maze.get_start()) if start is None else start
+        self.goal = maze.get_index(maze.get_goal()) if goal is None else goal
+        self.h = make_heuristic(maze, heuristic_name, self.goal)
+        size = maze.get_size()
+        # g: cost of the last expansion of a room, rhs: cost via the best predecessor (one step look-ahead)
+        self.g = array('d', [INFINITY]) * size
+        self.rhs = array('d', [INFINITY]) * size
+        self.rhs[self.start] = 0
+        # the key of every room in the queue, entries of the heap with another key are outdated
+        self.queued = {}
+        self.heap = []
+        self.expanded = 0   # expansions of the last call of compute_shortest_path
+        self.push(self.start)
+
+    def successors(self, index):
+        """
+        :return: List of (room index, cost) pairs of the moves from a room, read from the current connections
+        """
+        grid = self.grid
+        mask = grid.masks[index]
+        base = 6 * index
+        return [(index + grid.offsets[d], grid.costs[base + d]) for d in range(6) if mask & (1 << d)]
+
+    def predecessors(self, index):
+        """
+        :return: List of (room index, cost) pairs of the moves to a room, read from the current connections
+        """
+        grid = self.grid
+        result = []
+        for d in range(6):
+            # the room that reaches index by a move in direction d is in the opposite direction of index
+            other = index + grid.offsets[OPPOSITE[d]]
+            if 0 <= other < grid.size and grid.masks[other] & (1 << d):
+                result.append((other, grid.costs[6 * other + d]))
+        return result
+
+    def key(self, index):
+        best = min(self.g[index], self.rhs[index])
+        return best + self.h(index), best
+
+    def push(self, index):
+        key = self.key(index)
+        self.queued[index] = key
+        heapq.heappush(self.heap, (key, index))
+
+    def top_key(self):
+        """
+        :return: The lowest key in the queue, (inf, inf) if it is empty
+        """
+        heap = self.heap
+        while heap and self.queued.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)     # outdated entry
+        return heap[0][0] if heap else (INFINITY, INFINITY)
+
+    def update_room(self, index):
+        """
+        Recomputes rhs of a room from its predecessors and puts it in the queue if it is inconsistent
+        """
+        if index != self.start:
+            self.rhs[index] = min((self.g[other] + cost for other, cost in self.predecessors(index)),
+                                  default=INFINITY)
+        self.queued.pop(index, None)
+        if self.g[index] != self.rhs[index]:
+            self.push(index)
+
+    def compute_shortest_path(self):
+        """
+        Expands the inconsistent rooms until the cost of the goal room is final
+        :return: The cost of the cheapest path, inf if the goal can not be reached
+        """
+        self.expanded = 0
+        goal = self.goal
+        while self.top_key() < self.key(goal) or self.rhs[goal] != self.g[goal]:
+            _, index = heapq.heappop(self.heap)
+            del self.queued[index]
+            self.expanded += 1
+            if self.g[index] > self.rhs[index]:
+                self.g[index] = self.rhs[index]     # the room got cheaper
+            else:
+                self.g[index] = INFINITY            # the room got more expensive, its successors are recomputed
+                self.update_room(index)
+            for other, _ in self.successors(index):
+                self.update_room(other)
+        return self.g[goal]
+
+    def update(self, changes, both_ways=True):
+        """
+        Changes connections of the maze, the path is repaired by the next call of compute_shortest_path
+        :param changes: Iterable of (coordinates, direction, cost), a cost of None closes the connection
+        :param both_ways: If True, the connection back from the other room is changed as well
+        """
+        for coords, direction, cost in changes:
+            for _, target in self.maze.set_connection(coords, direction, cost, both_ways):
+                self.update_room(target)
+
+    def get_path(self):
+        """
+        :return: The state of the goal room with the cheapest path to it, None if there is no path
+        """
+        if self.g[self.goal] == INFINITY:
+            return None
+        path = [self.goal]
+        index = self.goal
+        while index != self.start:
+            index = min(self.predecessors(index), key=lambda move: self.g[move[0]] + move[1])[0]
+            path.append(index)
+        path.reverse()
+        return State.from_path(self.maze, path)
+
+
+def read_changes(file_name):
+    """
+    :param file_name: File with one change "x y z DIRECTION COST" per line, COST "-" closes the connection
+    :return: List of (coordinates, direction, cost)
+    """
+    changes = []
+    with open(file_name) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            x, y, z, direction, cost = line.split()
+            direction = direction.upper()
+            if direction not in DIRECTIONS:
+                raise ValueError("Unknown direction: " + line)
+            changes.append(((int(x), int(y), int(z)), direction, None if cost == "-" else int(cost)))
+    return changes
+
+
+if __name__ == "__main__":
+    from maze import Maze
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    heuristic_name = "MANHATTAN"
+    for option in sys.argv[1:]:
+        if option.startswith("--heuristic="):
+            heuristic_name = option.split("=", 1)[1].upper()
+    if len(args) != 2 or heuristic_name not in PLANNER_HEURISTICS:
+        print("Usage: python3 incremental.py file.maze changes.txt [--heuristic=MANHATTAN|FLOOR] [--one-way]")
+        exit(-1)
+
+    maze = Maze(args[0], compact=True)
+    planner = LPAStar(maze, heuristic_name=heuristic_name)
+    cost = planner.compute_shortest_path()
+    print("initial: cost=%s expanded=%d" % (cost, planner.expanded))
+    for coords, direction, new_cost in read_changes(args[1]):
+        planner.update([(coords, direction, new_cost)], both_ways="--one-way" not in sys.argv)
+        cost = planner.compute_shortest_path()
+        print("%s %s %s: cost=%s expanded=%d" % (coords, direction, "closed" if new_cost is None else new_cost,
+                                                cost, planner.expanded))
+    state = planner.get_path()
+    if state is not None:
+        state.print_actions()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Landmarks for the ALT heuristic: exact costs from and to a few landmark rooms, stored per maze
+file in a .alt file next to it, so they are only computed once per maze.
+"""
+import os
+import struct
+from array import array
+from maze_cache import cache_source, temp_name
+from shortest_paths import dijkstra, UNREACHABLE
+
+MAGIC = b"MAZEALT3"
+HEADER = struct.Struct("=8sqqqqq")
+
+
+class Landmarks:
+    """Exact costs from every landmark to every room and from every room to every landmark"""
+
+    def __init__(self, rooms, from_landmark, to_landmark, count):
+        """
+        :param rooms: The indices of the landmark rooms
+        :param from_landmark: Per landmark an array with the cost from the landmark to every room
+        :param to_landmark: Per landmark an array with the cost from every room to the landmark
+        :param count: The number of landmarks that was asked for, a small maze can have fewer rooms
+        """
+        self.count = count
+        self.rooms = rooms
+        self.from_landmark = from_landmark
+        self.to_landmark = to_landmark
+
+    @staticmethod
+    def compute(maze, count):
+        """
+        Chooses count landmarks with farthest point selection: every next landmark is the room that is
+        farthest from the landmarks chosen so far.
+        :param maze: The maze to compute the landmarks for
+        :param count: The number of landmarks
+        :return: Landmarks
+        """
+        n = maze.get_size()
+        start = maze.get_index(maze.get_start()) if maze.get_start() is not None else 0
+        distances, _ = dijkstra(maze, start)
+        # distance from the closest landmark, the first landmark is the room farthest from the start
+        closest = distances
+        rooms, from_landmark, to_landmark = [], [], []
+        for _ in range(count):
+            room = max(range(n), key=closest.__getitem__)
+            if closest[room] <= 0 or room in rooms:
+                break
+            rooms.append(room)
+            distances, _ = dijkstra(maze, room)
+            from_landmark.append(array('i', distances))
+            to_landmark.append(array('i', dijkstra(maze, room, reverse=True)[0]))
+            if len(rooms) == 1:
+                closest = array('q', distances)
+            else:
+                for i in range(n):
+                    if distances[i] != UNREACHABLE and (closest[i] == UNREACHABLE or distances[i] < closest[i]):
+                        closest[i] = distances[i]
+            for landmark in rooms:
+                closest[landmark] = 0
+        return Landmarks(rooms, from_landmark, to_landmark, count)
+
+    def save(self, file_name, source):
+        """
+        Writes the landmarks to file_name, failing to write is not an error
+        :param source: (size, modification time in ns) of the maze file, see maze_cache.source_stamp
+        :return: True if the file was written, False otherwise
+        """
+        try:
+            tmp_name = temp_name(file_name)
+            with open(tmp_name, "wb") as f:
+                size = len(self.from_landmark[0]) if self.rooms else 0
+                f.write(HEADER.pack(MAGIC, self.count, len(self.rooms), size, *source))
+                array('q', self.rooms).tofile(f)
+                for values in self.from_landmark + self.to_landmark:
+                    values.tofile(f)
+            os.replace(tmp_name, file_name)
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def load(file_name, size, source, count):
+        """
+        Reads landmarks written by save
+        :param size: The number of rooms of the maze
+        :param source: (size, modification time in ns) the maze file must have had when the file was written
+        :param count: The number of landmarks the file must have been computed for
+        :return: Landmarks, None if the file can not be used
+        """
+        try:
+            with open(file_name, "rb") as f:
+                magic, stored_count, found, stored_size, *stored_source = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or stored_size != size or tuple(stored_source) != source or stored_count != count:
+                    return None
+                rooms = array('q')
+                rooms.fromfile(f, found)
+                tables = []
+                for _ in range(2 * found):
+                    values = array('i')
+                    values.fromfile(f, size)
+                    tables.append(values)
+        except (OSError, EOFError, struct.error):
+            return None
+        return Landmarks(list(rooms), tables[:found], tables[found:], count)
+
+
+def landmarks_name(file_name):
+    """
+    :return: The name of the landmark file that belongs to a maze file
+    """
+    return os.path.splitext(file_name)[0] + ".alt"
+
+
+def get_landmarks(maze, count=4):
+    """
+    Returns the landmarks of a maze: from the maze object if they were used before, else from the .alt
+    file if it was made from the maze file as it is now for the same count, else they are computed and
+    written to the .alt file.
+    A maze changed by set_connection is no longer the maze file, its landmarks are only kept in memory.
+    :param maze: The maze
+    :param count: The number of landmarks to compute if they are not cached
+    :return: Landmarks
+    """
+    if maze.landmarks is not None and maze.landmarks.count == count:
+        return maze.landmarks
+    name = landmarks_name(maze.file_name)
+    source = cache_source(maze)
+    landmarks = None if source is None else Landmarks.load(name, maze.get_size(), source, count)
+    if landmarks is None:
+        landmarks = Landmarks.compute(maze, count)
+        if source is not None:
+            landmarks.save(name, source)
+    maze.landmarks = landmarks
+    return landmarks
@@ -1,30 +1,107 @@
 #!/usr/bin/env python3
 import sys
+from contextlib import nullcontext
 from maze_solver import *
+from heuristics import HEURISTICS
 from maze import Maze
+from hpa import get_abstraction
+from renderer import RENDER_MODES
+from landmarks import get_landmarks
+from search_stats import SearchStats
+from components import get_components
+from contraction import get_contraction
+from anytime import Budget, print_improvement
 
 run_default_algorithm = False
 
+# options start with "--" and may be given anywhere on the command line
+options = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+args = [sys.argv[0]] + [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+compact = "--compact" in options  # keep the maze in the compact grid only
+use_cache = "--no-cache" not in options  # read and write the binary maze cache (.mazeb)
+backend = "THREADSAFE" if "--threadsafe-fringe" in options else "FAST"  # fringe on queue lib or deque/heapq
+contract = "--contract" in options  # search the maze without dead ends and corridors (see contraction.py)
+nearest = "--nearest" in options  # from all start rooms at once to the nearest goal room
+heuristic_name = "MANHATTAN"  # heuristic of the informed searches, --heuristic=NAME
+cluster_size = None  # cluster size of HPA, --cluster-size=N, by default the stored or the default size
+render = "FULL"  # how much of the maze is printed, --render=FULL|FLOORS|WINDOW|NONE
+stats = None  # counters and phase timings, --stats prints them, --stats=FILE also writes them as JSON
+stats_file = None
+budget = Budget(report=print_improvement)  # ARASTAR: --weight=W, --time-limit=SECONDS, --max-expansions=N
+memory_limit = None  # most search nodes of SMASTAR, --memory=N
+beam_width = None  # rooms per depth of BEAM, --beam-width=N
+for option in options:
+    if option.startswith("--heuristic="):
+        heuristic_name = option.split("=", 1)[1].upper()
+    elif option.startswith("--render="):
+        render = option.split("=", 1)[1].upper()
+    elif option.startswith("--cluster-size="):
+        cluster_size = int(option.split("=", 1)[1])
+    elif option == "--stats" or option.startswith("--stats="):
+        stats = SearchStats(trace_memory="--trace-memory" in options)
+        stats_file = option.split("=", 1)[1] if "=" in option else None
+    elif option.startswith("--weight="):
+        budget.weight = max(1.0, float(option.split("=", 1)[1]))
+    elif option.startswith("--time-limit="):
+        budget.time_limit = float(option.split("=", 1)[1])
+    elif option.startswith("--max-expansions="):
+        budget.max_expansions = int(option.split("=", 1)[1])
+    elif option.startswith("--memory="):
+        memory_limit = int(option.split("=", 1)[1])
+    elif option.startswith("--beam-width="):
+        beam_width = int(option.split("=", 1)[1])
+if heuristic_name not in HEURISTICS:
+    print("Error: heuristic (" + heuristic_name + ") not in the list of possible heuristics " + str(list(HEURISTICS)))
+    exit(-1)
+if render not in RENDER_MODES:
+    print("Error: render mode (" + render + ") not in the list of possible modes " + str(list(RENDER_MODES)))
+    exit(-1)
+
 try:  # look if algorithm is given as argument, otherwise use default
-    algorithm = sys.argv[1].upper()
-    accepted_algorithms = ["DFS", "IDS", "BFS", "UCS", "ASTAR", "GREEDY"]
+    algorithm = args[1].upper()
+    accepted_algorithms = list(ALGORITHMS)
     if algorithm not in accepted_algorithms:  # check if algorithm is valid one
         print("Error: search algorithm (" + algorithm + ") not in the list of possible algorithms")
-        print("Usage: python3 ALGORITHM [maze_file.maze]")
+        print("Usage: python3 ALGORITHM [maze_file.maze] [--compact] [--no-cache] [--threadsafe-fringe] [--contract] [--nearest] [--heuristic=NAME] [--cluster-size=N] [--render=MODE] [--stats[=FILE.json]] [--trace-memory] [--weight=W] [--time-limit=SECONDS] [--max-expansions=N] [--memory=N] [--beam-width=N]")
         accepted_algorithms.sort()
         print("Possible algorithms: " + str(accepted_algorithms))
         exit(-1)
 except IndexError:
     run_default_algorithm = True
     algorithm = "BFS"
+if nearest and algorithm not in NEAREST_ALGORITHMS:
+    print("Error: --nearest only works with " + str(list(NEAREST_ALGORITHMS)))
+    exit(-1)
+
+
+
+def phase(name):
+    """ Times a phase when --stats is given """
+    return stats.phase(name) if stats is not None else nullcontext()
+
 
-if len(sys.argv) > 2: # if maze file is given as argument, use that. Otherwise use default.maze
-    maze = Maze(sys.argv[2])
-else:
-    maze = Maze()
+with phase("load"):
+    if len(args) > 2: # if maze file is given as argument, use that. Otherwise use default.maze
+        maze = Maze(args[2], compact=compact, use_cache=use_cache)
+    else:
+        maze = Maze(compact=compact, use_cache=use_cache)
 
-maze.print_maze(True)
-solve_maze_general(maze, algorithm)
+if render == "FULL":
+    maze.print_maze(True)  # the other modes only draw the part of the maze that the path is in
+with phase("preprocess"):
+    get_components(maze)  # stored next to the maze file, unsolvable mazes are found without searching
+    if contract:
+        get_contraction(maze)  # stored next to the maze file
+    if algorithm == "HPA":
+        get_abstraction(maze, cluster_size)  # stored next to the maze file
+    if heuristic_name == "ALT" and stats is not None:
+        get_landmarks(maze)  # else they are made by the first search that uses them
+solve_maze_general(maze, algorithm, backend, heuristic_name, render, stats, budget, memory_limit, beam_width,
+                   nearest)
+if stats is not None:
+    stats.print_stats()
+    if stats_file is not None:
+        stats.to_json(stats_file)
 
 if run_default_algorithm:
     print("No algorithm given as argument, used default (BFS)")
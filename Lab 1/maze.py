@@ -1,18 +1,46 @@
 #!/usr/bin/env python3
 import sys
+from array import array
 from room import Room
+from renderer import Renderer
+from grid import MazeGrid, DIRECTIONS, DIRECTION_BITS
+import maze_cache
+
+# change of the coordinates (x, y, z) of a move in each direction, and the direction back
+MOVES = {"UP": (0, 0, 1), "DOWN": (0, 0, -1), "NORTH": (0, -1, 0), "SOUTH": (0, 1, 0), "EAST": (1, 0, 0),
+         "WEST": (-1, 0, 0)}
+OPPOSITE = {"UP": "DOWN", "DOWN": "UP", "NORTH": "SOUTH", "SOUTH": "NORTH", "EAST": "WEST", "WEST": "EAST"}
 
 
 class Maze:
     """Class to save all the characteristics of a maze"""
 
-    def __init__(self, file_name="default.maze"):
+    def __init__(self, file_name="default.maze", compact=False, use_cache=True):
+        """
+        :param file_name: The maze file to read
+        :param compact: If True, only the compact grid is kept and a new Room object is created on every access,
+                        otherwise a Room object is created on its first access and kept
+        :param use_cache: If True, the binary cache (.mazeb) next to the maze file is used and written
+        """
         self.width = None
         self.height = None
         self.floors = None
-        self.rooms = None
+        self.rooms = None   # room index -> Room of the rooms used so far, None if compact
+        self.grid = None
         self.goal = None
         self.start = None
+        self.goals = []     # coordinates of all goal rooms, the goal is the last one in the file
+        self.starts = []    # coordinates of all start rooms, the start is the last one in the file
+        self.goal_rooms = frozenset()   # indices of the goal rooms
+        self.start_rooms = frozenset()  # indices of the start rooms
+        self.compact = compact
+        self.use_cache = use_cache
+        self.file_name = file_name
+        self.landmarks = None   # landmarks of the ALT heuristic, see landmarks.get_landmarks
+        self.abstraction = None     # cluster graph of the HPA algorithm, see hpa.get_abstraction
+        self.components = None  # strongly connected components, see components.get_components
+        self.contraction = None     # graph without dead ends and corridors, see contraction.get_contraction
+        self.renderer = None    # draws the maze, made when the maze is printed for the first time
         self.read_maze(file_name)
 
     def get_goal(self):
@@ -27,6 +55,18 @@ class Maze:
         """
         return self.start
 
+    def get_goals(self):
+        """
+        :return: List of the coordinates (x, y, z) of every goal room, in the order of the maze file
+        """
+        return self.goals
+
+    def get_starts(self):
+        """
+        :return: List of the coordinates (x, y, z) of every start room, in the order of the maze file
+        """
+        return self.starts
+
     def get_room(self, x, y, z):
         """
         returns the room with coordinates (x, y, z)
@@ -35,7 +75,114 @@ class Maze:
         :param z: y coordinate of the desired room
         :return: The room with coordinates (x, y, z)
         """
-        return self.rooms[x][y][z]
+        return self.get_room_by_index(self.grid.get_index((x, y, z)))
+
+    def get_room_by_index(self, index):
+        """
+        :param index: The index of the desired room
+        :return: The room with the given index
+        """
+        if self.rooms is None:
+            return self.make_room(index)
+        room = self.rooms.get(index)
+        if room is None:
+            room = self.rooms[index] = self.make_room(index)
+        return room
+
+    def make_room(self, index):
+        """
+        Creates a Room object from the data in the compact grid
+        :param index: The index of the room
+        :return: A new Room with the connections, costs and heuristic of the grid
+        """
+        room = Room(self.grid.get_coords(index), self, index)
+        room.connections = self.grid.get_connections(index)
+        room.costs = self.grid.get_costs(index)
+        room.heuristicValue = self.grid.get_heuristic(index)
+        if index in self.goal_rooms:
+            room.set_goal()
+        if index in self.start_rooms:
+            room.set_start()
+        return room
+
+    def neighbors(self, index):
+        """
+        Returns the rooms that can be reached in one move, taken from the adjacency table built at load time
+        :param index: The index of a room
+        :return: List of (neighbor index, step cost) pairs
+        """
+        return self.grid.neighbors(index)
+
+    def predecessors(self, index):
+        """
+        Returns the rooms from which a room can be reached in one move (the reverse edges)
+        :param index: The index of a room
+        :return: List of (predecessor index, step cost) pairs
+        """
+        return self.grid.predecessors(index)
+
+    def set_connection(self, coords, direction, cost=None, both_ways=True):
+        """
+        Opens, closes or changes the cost of a connection of a room, e.g. when a door opens or closes.
+        The landmarks, the HPA abstraction, the components and the reduced graph of the maze are dropped, they
+        are no longer valid.
+        :param coords: The coordinates (x, y, z) of the room
+        :param direction: The direction of the connection
+        :param cost: The cost of the move, None closes the connection
+        :param both_ways: If True, the connection back from the other room is changed as well
+        :return: List of the (from index, to index) moves that changed
+        """
+        dx, dy, dz = MOVES[direction]
+        x, y, z = coords
+        other = (x + dx, y + dy, z + dz)
+        if not (0 <= other[0] < self.width and 0 <= other[1] < self.height and 0 <= other[2] < self.floors):
+            raise ValueError("There is no room %s of %s" % (direction, str(coords)))
+        index = self.grid.get_index(coords)
+        other_index = self.grid.get_index(other)
+        changed = [(index, other_index)]
+        self.grid.set_connection(index, direction, cost)
+        if both_ways:
+            self.grid.set_connection(other_index, OPPOSITE[direction], cost)
+            changed.append((other_index, index))
+        if self.rooms is not None:
+            # the rooms are made again from the grid when they are used
+            self.rooms.pop(index, None)
+            self.rooms.pop(other_index, None)
+        self.landmarks = None
+        self.abstraction = None
+        self.components = None
+        self.contraction = None
+        return changed
+
+    def get_step_cost(self, from_index, to_index):
+        """
+        :return: The cost of the move from room from_index to room to_index, None if they are not connected
+        """
+        for index, cost in self.neighbors(from_index):
+            if index == to_index:
+                return cost
+        return None
+
+    def get_size(self):
+        """
+        :return: The total number of rooms in the maze
+        """
+        return self.width * self.height * self.floors
+
+    def get_index(self, coords):
+        """
+        Maps the coordinates of a room to a unique integer in [0, get_size())
+        :param coords: The coordinates (x, y, z) of the room
+        :return: The index of the room
+        """
+        return self.grid.get_index(coords)
+
+    def get_coords(self, index):
+        """
+        :param index: The index of a room
+        :return: The coordinates (x, y, z) of the room
+        """
+        return self.grid.get_coords(index)
 
     # -------------------------------------------------------------------------------------	#
     # The part below is only for reading the maze files and printing the maze				#
@@ -58,27 +205,57 @@ class Maze:
             return "SOUTH"
         return ""
 
-    @staticmethod
-    def get_dir(room, to_from, direction):
-        coords = room.get_coords()
-        if coords in direction and to_from in direction[coords]:
-            return direction[room.get_coords()][to_from]
-        return ""
-
     def read_maze(self, file_name):
+        if self.use_cache:
+            grid = maze_cache.load(file_name)
+            if grid is not None:
+                self.set_grid(grid)
+                return
+        # taken before reading, so a file that changes while it is read does not get a cache of the old version
+        source = maze_cache.source_stamp(file_name)
         try:
             f = open(file_name, "r")
         except FileNotFoundError:
             print("File: " + file_name + " not found, exit")
             sys.exit(-1)
-        self.width = int(f.readline().split("Width:")[1].strip())
-        self.height = int(f.readline().split("Height:")[1].strip())
-        self.floors = int(f.readline().split("Floors:")[1].strip())
-        self.rooms = [[[None for _ in range(self.floors)]
-                       for _ in range(self.height)] for _ in range(self.width)]
+        # read the whole file at once, the floors are parsed from the list of lines
+        with f:
+            lines = f.read().splitlines()
+        self.width = int(lines[0].split("Width:")[1].strip())
+        self.height = int(lines[1].split("Height:")[1].strip())
+        self.floors = int(lines[2].split("Floors:")[1].strip())
+        self.grid = MazeGrid(self.width, self.height, self.floors)
+        self.grid.source = source
 
+        pos = 3
         for idx in range(self.floors):
-            self.read_floor(f)
+            pos = self.read_floor(lines, pos)
+        # the searches with one start and one goal use the last ones in the file
+        if self.grid.starts:
+            self.grid.start = self.grid.starts[-1]
+        if self.grid.goals:
+            self.grid.goal = self.grid.goals[-1]
+        self.grid.build_adjacency()
+        if self.use_cache:
+            maze_cache.save(self.grid, file_name)
+        self.set_grid(self.grid)
+
+    def set_grid(self, grid):
+        """
+        Makes grid the storage of this maze, the Room objects are made when they are used
+        :param grid: A filled MazeGrid with its adjacency table built
+        """
+        self.grid = grid
+        self.width = grid.width
+        self.height = grid.height
+        self.floors = grid.floors
+        self.start = None if grid.start is None else grid.get_coords(grid.start)
+        self.goal = None if grid.goal is None else grid.get_coords(grid.goal)
+        self.starts = [grid.get_coords(index) for index in grid.starts]
+        self.goals = [grid.get_coords(index) for index in grid.goals]
+        self.start_rooms = frozenset(grid.starts)
+        self.goal_rooms = frozenset(grid.goals)
+        self.rooms = None if self.compact else {}
 
     @staticmethod
     def get_heuristic(row):
@@ -89,7 +266,12 @@ class Maze:
             return None
 
     @staticmethod
-    def check_connection(room, cell, direction):
+    def connection_tables(direction):
+        """
+        Builds translation tables for the character that encodes a connection in direction.
+        A connection is open if the character is the check character or a digit (the custom cost).
+        :return: Tables (bit, cost) mapping every byte to its connection bit and to its step cost
+        """
         check = " "
         cost = 1
         if direction == "UP":
@@ -98,174 +280,85 @@ class Maze:
         if direction == "DOWN":
             check = "D"
             cost += 1
-        if cell == check or cell.isnumeric():
-            room.connections.append(direction)
-            if cell.isnumeric():
-                room.costs[direction] = int(cell)
-            else:
-                room.costs[direction] = cost
-
-    def read_floor(self, f):
-        line = f.readline()
+        bit = DIRECTION_BITS[direction]
+        bits = bytearray(256)
+        costs = bytearray(256)
+        bits[ord(check)] = bit
+        costs[ord(check)] = cost
+        for digit in range(10):
+            bits[ord(str(digit))] = bit
+            costs[ord(str(digit))] = digit
+        return bytes(bits), bytes(costs)
+
+    # (direction, row of the room (0 top border, 2 middle, 4 bottom border), column in the room)
+    CONNECTION_CELLS = (("UP", 2, 2), ("DOWN", 2, 6), ("NORTH", 0, 4),
+                        ("SOUTH", 4, 4), ("EAST", 2, 8), ("WEST", 2, 0))
+
+    def read_floor(self, lines, pos):
+        """
+        Parses one floor. Each connection is read for a whole row of rooms at once by
+        taking every 8th character of a line and translating it to connection bits and costs.
+        :param lines: All lines of the maze file
+        :param pos: Position in lines to start looking for the floor
+        :return: Position in lines right after the floor
+        """
         # get rid of empty lines
-        while "Floor #" not in line:
-            line = f.readline()
-        floor = int(line.split("Floor #")[1].strip())
-        lines = [None] * 5
-        # order:0 UP, 1 DOWN,2 NORTH,3 SOUTH,4 EAST,5 WEST
-
-        # read first row
-        lines[0] = f.readline()
-        # loop through each row
-        for idy in range(self.height):
-            for i in range(1, 5):
-                lines[i] = f.readline()
-            for idx in range(self.width):
-                # create room and add to array
-                room = Room((idx, idy, floor), self)
-                self.rooms[idx][idy][floor] = room
-                start = idx * 8
-                # get part of input for one room
-                r = [row[start:start + 9] for row in lines]
-                room.heuristicValue = self.get_heuristic(r[1])
-                self.check_connection(room, r[2][2], "UP")
-                self.check_connection(room, r[2][6], "DOWN")
-                self.check_connection(room, r[0][4], "NORTH")
-                self.check_connection(room, r[4][4], "SOUTH")
-                self.check_connection(room, r[2][8], "EAST")
-                self.check_connection(room, r[2][0], "WEST")
-                if "G" in r[2]:
-                    self.goal = (idx, idy, floor)
-                    room.set_goal()
-                if "X" in r[2]:
-                    self.start = (idx, idy, floor)
-                    room.set_start()
-            # last line is first line for next row
-            lines[0] = lines[4]
-
-    def get_room_line_one(self, room, print_coords, direction):
-        # value_when_true if condition else value_when_false
-        c = " "
-        if self.get_dir(room, 'from', direction) is "NORTH":
-            c = "v"
-        if self.get_dir(room, 'to', direction) is "NORTH":
-            c = "^"
-
-        return ("|--|%s|--" % c) if room.can_move_to("NORTH") else "|-------"
-
-    def get_room_line_two(self, room, print_coords, direction):
-        west = "-" if room.can_move_to("WEST") else "|"
-        c = " "
-        if self.get_dir(room, 'from', direction) is "NORTH":
-            c = "v"
-        if self.get_dir(room, 'to', direction) is "NORTH":
-            c = "^"
-        heuristic = "  "
-        if room.get_heuristic_value() is not None:
-            heuristic = '{:>2}'.format(room.get_heuristic_value())
-        cost = "   "
-        coords = room.get_coords()
-        if coords in direction and 'cost' in direction[coords]:
-            cost = '{:>3}'.format(direction[room.get_coords()]['cost'])
-        return "%s%s %s%s" % (west, heuristic, c, cost)
-
-    def get_middle_char(self, room, direction):
-        if room.is_start():
-            return "X"
-        if room.is_goal():
-            return "G"
-        if self.get_dir(room, 'to', direction) is "UP":
-            return "o"
-        if self.get_dir(room, 'to', direction) is "DOWN":
-            return "o"
-        if self.get_dir(room, 'from', direction) is "UP":
-            return "o"
-        if self.get_dir(room, 'from', direction) is "DOWN":
-            return "o"
-        return " "
-
-    def get_room_line_three(self, room, print_coords, direction):
-        up = "U" if room.can_move_to("UP") else " "
-        down = "D" if room.can_move_to("DOWN") else " "
-        west = " " if room.can_move_to("WEST") else "|"
-        from_to_west = " "
-        from_to_east = " "
-        if self.get_dir(room, 'from', direction) is "WEST":
-            from_to_west = ">"
-        if self.get_dir(room, 'to', direction) is "WEST":
-            from_to_west = "<"
-        if self.get_dir(room, 'from', direction) is "EAST":
-            from_to_east = "<"
-        if self.get_dir(room, 'to', direction) is "EAST":
-            from_to_east = ">"
-
-        mid = self.get_middle_char(room, direction)
-        return ("%s%s%s%s%s%s%s%s" %
-                (west, from_to_west, up, from_to_west, mid, from_to_east, down, from_to_east))
-
-    def get_room_line_four(self, room, print_coords, direction):
-        west = "-" if room.can_move_to("WEST") else "|"
-        if print_coords:
-            return "%s %s %s %s " % ((west,) + room.get_coords())
-        c = " "
-        if self.get_dir(room, 'from', direction) is "SOUTH":
-            c = "^"
-        if self.get_dir(room, 'to', direction) is "SOUTH":
-            c = "v"
-        return "%s   %s   " % (west, c)
-
-    def get_directions(self, state):
-        direction = {}
-        while state is not None:
-            parent = state.get_parent()
-            if parent is None:
-                break
-            coords = state.get_room().get_coords()
-            if coords not in direction:
-                direction[coords] = {}
-            direction[coords]['from'] = \
-                self.get_move_dir(coords, parent.get_room().get_coords())
-            direction[coords]['cost'] = state.get_cost()
-
-            if parent.get_room().get_coords() not in direction:
-                direction[parent.get_room().get_coords()] = {}
-            direction[parent.get_room().get_coords()]['to'] = \
-                self.get_move_dir(parent.get_room().get_coords(), coords)
-
-            state = parent
-        return direction
-
-    def get_floor_string(self, idz, print_coords, direction={}):
-        lines = [""] * (4 * self.height + 1)
-        y_line = 0
+        while "Floor #" not in lines[pos]:
+            pos += 1
+        floor = int(lines[pos].split("Floor #")[1].strip())
+        pos += 1
+        line_length = 8 * self.width + 1
+        tables = [self.connection_tables(d) for d, _, _ in self.CONNECTION_CELLS]
+        grid = self.grid
+
+        # loop through each row, the last line of a row is the first line of the next row
         for idy in range(self.height):
-            y_line = idy * 4
-            for idx in range(self.width):
-                room = self.rooms[idx][idy][idz]
-                lines[y_line] += self.get_room_line_one(room, print_coords, direction)
-                lines[y_line + 1] += self.get_room_line_two(room, print_coords, direction)
-                lines[y_line + 2] += self.get_room_line_three(room, print_coords, direction)
-                lines[y_line + 3] += self.get_room_line_four(room, print_coords, direction)
+            rows = [lines[pos + 4 * idy + i].ljust(line_length, "|") for i in range(5)]
+            encoded = [row.encode("latin-1", "replace") for row in rows]
+            base = grid.get_index((0, idy, floor))
+            mask = 0
+            for (direction, row, column), (bits, costs) in zip(self.CONNECTION_CELLS, tables):
+                chars = encoded[row][column::8][:self.width]
+                mask |= int.from_bytes(chars.translate(bits), "little")
+                d = DIRECTIONS.index(direction)
+                grid.costs[6 * base + d:6 * (base + self.width) + d:6] = array('B', chars.translate(costs))
+            grid.masks[base:base + self.width] = mask.to_bytes(self.width, "little")
+
+            # heuristic values, most rows have none
+            if rows[1].strip("|- "):
+                for idx in range(self.width):
+                    start = idx * 8
+                    grid.set_heuristic(base + idx, self.get_heuristic(rows[1][start:start + 9]))
 
-            for i in range(4):
-                lines[y_line + i] += "|"
-        lines[y_line + 4] += "|-------" * self.width + "|"
-        return lines
+            # a marker on the border between two rooms belongs to the room on its right
+            for marker, rooms in (("G", grid.goals), ("X", grid.starts)):
+                column = rows[2].find(marker)
+                while column != -1:
+                    index = base + min(column // 8, self.width - 1)
+                    if not rooms or rooms[-1] != index:
+                        rooms.append(index)
+                    column = rows[2].find(marker, column + 1)
+        return pos + 4 * self.height + 1
 
-    def print_maze(self, print_coords=False):
+    def print_maze(self, print_coords=False, mode="FULL", out=None):
         """
         Prints the maze to std out. If print_coords is True, then it also prints the coordinates in each cell
         :param print_coords: Boolean (True, False) to print coordinates or not.
+        :param mode: What to draw, see renderer.RENDER_MODES
+        :param out: Text stream to write to, by default sys.stdout
         """
-        self.print_maze_with_path(None, print_coords=print_coords)
-
-    def print_maze_with_path(self, state, print_coords=False):
-        d = self.get_directions(state)
-        print("Width: %d \nHeight: %d \nFloors: %d" %
-              (self.width, self.height, self.floors))
+        self.print_maze_with_path(None, print_coords=print_coords, mode=mode, out=out)
 
-        # loop descending through all floors
-        for f in range(self.floors - 1, -1, -1):
-            print("\nFloor #" + str(f))
-            for line in self.get_floor_string(f, print_coords, direction=d):
-                print(line)
+    def print_maze_with_path(self, state, print_coords=False, mode="FULL", margin=2, out=None):
+        """
+        Prints the maze with the path to state drawn in it
+        :param state: The last state of the path, None for no path
+        :param print_coords: Boolean (True, False) to print coordinates or not.
+        :param mode: What to draw: FULL, FLOORS (the floors of the path), WINDOW (the part of those floors
+                     around the path, with margin rooms around it) or NONE, see renderer.py
+        :param margin: The number of rooms drawn around the path in WINDOW mode
+        :param out: Text stream to write to, by default sys.stdout
+        """
+        if self.renderer is None:
+            self.renderer = Renderer(self)
+        self.renderer.render(state, print_coords, mode, margin, out)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Binary cache (.mazeb) of parsed maze files. The file holds the compact grid and its adjacency
+table and is memory-mapped on load, so reading a maze a second time does no parsing at all.
+
+layout (native byte order):
+    magic (8 bytes), width, height, floors, start, goal, number of edges, number of starts, number of goals,
+    size and modification time (ns) of the maze file (10 x int64)
+    masks (size bytes), costs (6 * size bytes), padding to 8 bytes
+    heuristics (size x int16), padding to 8 bytes
+    adjacency offsets ((size + 1) x int32), adjacency targets (edges x int32), adjacency costs (edges bytes),
+    padding to 8 bytes
+    start rooms (starts x int64), goal rooms (goals x int64)
+"""
+import mmap
+import os
+import struct
+from array import array
+from grid import MazeGrid
+
+MAGIC = b"MAZEB\x00\x04\x00"
+HEADER = struct.Struct("=8s10q")
+NONE = -1
+
+
+def cache_name(file_name):
+    """
+    :param file_name: The name of a .maze file
+    :return: The name of the binary cache that belongs to it
+    """
+    return os.path.splitext(file_name)[0] + ".mazeb"
+
+
+def source_stamp(file_name):
+    """
+    :param file_name: The name of a maze file
+    :return: (size in bytes, modification time in ns) of the file, None if it can not be read. A cache file
+             stores the stamp of the maze file it was made from and is only used while the stamp is the same,
+             a newer modification time alone is not enough: cp -p and tar keep the old times.
+    """
+    try:
+        info = os.stat(file_name)
+    except OSError:
+        return None
+    return info.st_size, info.st_mtime_ns
+
+
+def temp_name(file_name):
+    """
+    :param file_name: The name of a cache file
+    :return: The name of the temporary file this process writes the cache to before it replaces file_name. It is
+             in the same directory (os.replace is atomic there) and differs per process, so workers that write
+             the cache of the same maze at once never write into the same temporary file.
+    """
+    return "%s.%d.tmp" % (file_name, os.getpid())
+
+
+def cache_source(maze):
+    """
+    :param maze: A Maze
+    :return: The stamp of the maze file (see source_stamp) that the cache files of the maze are read and written
+             with, None if they are not used: the maze was changed after it was read or its file is unknown
+    """
+    grid = maze.grid
+    return None if grid.mutated else grid.source
+
+
+def align(offset):
+    return (offset + 7) & ~7
+
+
+def save(grid, file_name):
+    """
+    Writes the grid to the binary cache next to the maze file. Failing to write is not an error,
+    the maze is just parsed again next time.
+    :param grid: The MazeGrid to store, its adjacency table must be built and its source known
+    :param file_name: The name of the .maze file the grid was read from
+    :return: True if the cache was written, False otherwise
+    """
+    if grid.source is None or grid.mutated:
+        return False
+    edges = len(grid.adjacency_targets)
+    start = NONE if grid.start is None else grid.start
+    goal = NONE if grid.goal is None else grid.goal
+    parts = [HEADER.pack(MAGIC, grid.width, grid.height, grid.floors, start, goal, edges, len(grid.starts),
+                         len(grid.goals), *grid.source),
+             bytes(grid.masks), grid.costs.tobytes()]
+    offset = HEADER.size + 7 * grid.size
+    parts.append(bytes(align(offset) - offset))
+    offset = align(offset) + 2 * grid.size
+    parts.append(grid.heuristics.tobytes())
+    parts.append(bytes(align(offset) - offset))
+    parts.append(grid.adjacency_offsets.tobytes())
+    parts.append(grid.adjacency_targets.tobytes())
+    parts.append(grid.adjacency_costs.tobytes())
+    offset = align(offset) + 4 * (grid.size + 1) + 5 * edges
+    parts.append(bytes(align(offset) - offset))
+    parts.append(array('q', grid.starts + grid.goals).tobytes())
+
+    # write to a temporary file first, so a reader never sees a half written cache
+    name = cache_name(file_name)
+    tmp_name = temp_name(name)
+    try:
+        with open(tmp_name, "wb") as f:
+            for part in parts:
+                f.write(part)
+        os.replace(tmp_name, name)
+    except OSError:
+        return False
+    return True
+
+
+def load(file_name):
+    """
+    Memory-maps the binary cache of a maze file, if there is one that was made from the file as it is now
+    :param file_name: The name of a .maze file, or of a .mazeb file itself (which is used as it is)
+    :return: A MazeGrid backed by the mapped file, None if there is no usable cache
+    """
+    if file_name.endswith(".mazeb"):
+        name = file_name
+        source = None
+    else:
+        name = cache_name(file_name)
+        source = source_stamp(file_name)
+        if source is None:
+            return None
+    try:
+        with open(name, "rb") as f:
+            # copy-on-write: the grid can still be changed in memory without touching the file
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, width, height, floors, start, goal, edges, starts, goals, *stored_source = HEADER.unpack_from(data)
+    size = width * height * floors
+    adjacency = align(align(HEADER.size + 7 * size) + 2 * size)
+    if magic != MAGIC or len(data) < align(adjacency + 4 * (size + 1) + 5 * edges) + 8 * (starts + goals):
+        return None
+    if source is not None and tuple(stored_source) != source:
+        return None     # the maze file changed after the cache was written
+
+    grid = MazeGrid(width, height, floors, allocate=False)
+    view = memoryview(data)
+    offset = HEADER.size
+    grid.masks = view[offset:offset + size]
+    offset += size
+    grid.costs = view[offset:offset + 6 * size]
+    offset = align(offset + 6 * size)
+    grid.heuristics = view[offset:offset + 2 * size].cast('h')
+    offset = align(offset + 2 * size)
+    grid.adjacency_offsets = view[offset:offset + 4 * (size + 1)].cast('i')
+    offset += 4 * (size + 1)
+    grid.adjacency_targets = view[offset:offset + 4 * edges].cast('i')
+    offset += 4 * edges
+    grid.adjacency_costs = view[offset:offset + edges]
+    offset = align(offset + edges)
+    marked = view[offset:offset + 8 * (starts + goals)].cast('q').tolist()
+    grid.starts = marked[:starts]
+    grid.goals = marked[starts:]
+    grid.start = None if start == NONE else start
+    grid.goal = None if goal == NONE else goal
+    grid.source = tuple(stored_source)
+    return grid
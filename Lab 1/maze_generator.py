@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Generates random mazes in the .maze format, to test the solvers on large mazes.
+
+usage: python3 maze_generator.py WIDTH HEIGHT FLOORS [file.maze] [--seed=N] [--branching=P] [--loops=P]
+                                 [--costs=P] [--max-cost=N] [--stairs=P] [--one-way=P] [--starts=N] [--goals=N]
+
+Every floor is a spanning tree of its rooms, carved with the growing tree algorithm, so all
+rooms of a floor are connected. Floors are connected by stairs (U in the lower room, D in the
+room above it). The start (X) and goal (G) rooms are different random rooms. Without a file name the
+maze is written to stdout.
+"""
+import random
+import sys
+from array import array
+
+# translation tables from the stored connection characters (0 is a wall) to the characters in the file
+DASH_IF_WALL = bytes([ord("-")]) + bytes(range(1, 256))
+PIPE_IF_WALL = bytes([ord("|")]) + bytes(range(1, 256))
+SPACE_IF_NONE = bytes([ord(" ")]) + bytes(range(1, 256))
+PIPE_IF_OPEN = bytes([ord("-")]) + bytes([ord("|")]) * 255
+DASH_IF_OPEN = bytes([ord("|")]) + bytes([ord("-")]) * 255
+
+
+class MazeGenerator:
+    """Random maze with seeded randomness"""
+
+    def __init__(self, width, height, floors, seed=None, branching=0.0, loops=0.0, costs=0.0,
+                 max_cost=9, stairs=0.01, one_way=0.0, starts=1, goals=1):
+        """
+        :param width: Number of rooms in x direction
+        :param height: Number of rooms in y direction
+        :param floors: Number of floors
+        :param seed: Seed of the random generator, the same seed gives the same maze
+        :param branching: Chance [0, 1] to grow the tree from a random room instead of the newest room.
+                          0 gives long corridors (depth first), 1 gives many short branches
+        :param loops: Chance [0, 1] that a wall left by the spanning tree is opened, which creates loops
+        :param costs: Chance [0, 1] that an open connection gets a custom cost
+        :param max_cost: The highest custom cost (at most 9, costs are written as one digit)
+        :param stairs: Chance [0, 1] for every room to get a stair to the floor above it
+        :param one_way: Chance [0, 1] that a stair can only be used in one direction
+        :param starts: Number of start rooms
+        :param goals: Number of goal rooms
+        """
+        self.width = width
+        self.height = height
+        self.floors = floors
+        self.branching = branching
+        self.loops = loops
+        self.costs = costs
+        self.max_cost = min(max_cost, 9)
+        self.stairs = stairs
+        self.one_way = one_way
+        self.start_count = max(1, starts)
+        self.goal_count = max(1, goals)
+        self.rng = random.Random(seed)
+        size = width * height * floors
+        # stair characters per room (0 when there is no stair), indexed like MazeGrid
+        self.up = bytearray(size)
+        self.down = bytearray(size)
+        self.starts = []
+        self.goals = []
+
+    def custom_cost(self, default):
+        """
+        :param default: The character used for a connection with the default cost
+        :return: default, or with probability self.costs a digit with a custom cost
+        """
+        if self.costs and self.max_cost >= 2 and self.rng.random() < self.costs:
+            return ord(str(self.rng.randint(2, self.max_cost)))
+        return ord(default)
+
+    def place_stairs(self):
+        """
+        Places the stairs between every pair of floors. At least one two way stair is placed
+        between two floors, so the whole maze is connected.
+        """
+        rng = self.rng
+        floor_size = self.width * self.height
+        for z in range(self.floors - 1):
+            base = z * floor_size
+            rooms = [rng.randrange(floor_size)]
+            if self.stairs:
+                rooms += [i for i in range(floor_size) if rng.random() < self.stairs]
+            for n, i in enumerate(rooms):
+                up = down = True
+                if n > 0 and self.one_way and rng.random() < self.one_way:
+                    up = rng.random() < 0.5
+                    down = not up
+                if up:
+                    self.up[base + i] = self.custom_cost("U")
+                if down:
+                    self.down[base + floor_size + i] = self.custom_cost("D")
+
+    def place_start_and_goal(self):
+        """ Picks different random rooms as the starts and goals """
+        size = self.width * self.height * self.floors
+        start = self.rng.randrange(size)
+        goal = start
+        while goal == start and size > 1:
+            goal = self.rng.randrange(size)
+        self.starts = [start]
+        self.goals = [goal]
+        # the extra rooms are picked after the first pair, so a seed gives the same first pair as before
+        taken = {start, goal}
+        for rooms, count in ((self.starts, self.start_count), (self.goals, self.goal_count)):
+            while len(rooms) < count and len(taken) < size:
+                index = self.rng.randrange(size)
+                if index not in taken:
+                    taken.add(index)
+                    rooms.append(index)
+
+    def carve_floor(self):
+        """
+        Carves a spanning tree over the rooms of one floor with the growing tree algorithm
+        :return: (east, south) bytearrays with per room the character of the connection to the east
+                 and to the south, 0 when there is a wall
+        """
+        rng = self.rng
+        random_value = rng.random
+        randrange = rng.randrange
+        width = self.width
+        n = width * self.height
+        east = bytearray(n)
+        south = bytearray(n)
+        visited = bytearray(n)
+
+        cell = randrange(n)
+        visited[cell] = 1
+        active = array('l', [cell])
+        options = [0] * 4
+        while active:
+            if self.branching and random_value() < self.branching:
+                i = randrange(len(active))
+            else:
+                i = len(active) - 1
+            cell = active[i]
+            x = cell % width
+            count = 0
+            if x > 0 and not visited[cell - 1]:
+                options[count] = cell - 1
+                count += 1
+            if x < width - 1 and not visited[cell + 1]:
+                options[count] = cell + 1
+                count += 1
+            if cell >= width and not visited[cell - width]:
+                options[count] = cell - width
+                count += 1
+            if cell + width < n and not visited[cell + width]:
+                options[count] = cell + width
+                count += 1
+            if count == 0:
+                # no unvisited neighbours left, remove the room from the active list
+                active[i] = active[-1]
+                active.pop()
+                continue
+
+            new_cell = options[randrange(count)] if count > 1 else options[0]
+            if new_cell == cell + 1:
+                east[cell] = self.custom_cost(" ")
+            elif new_cell == cell - 1:
+                east[new_cell] = self.custom_cost(" ")
+            elif new_cell == cell + width:
+                south[cell] = self.custom_cost(" ")
+            else:
+                south[new_cell] = self.custom_cost(" ")
+            visited[new_cell] = 1
+            active.append(new_cell)
+
+        if self.loops:
+            for cell in range(n):
+                if not east[cell] and cell % width < width - 1 and random_value() < self.loops:
+                    east[cell] = self.custom_cost(" ")
+                if not south[cell] and cell + width < n and random_value() < self.loops:
+                    south[cell] = self.custom_cost(" ")
+        return east, south
+
+    def write_floor(self, f, z):
+        """
+        Carves floor z and writes it to f
+        :param f: Text stream to write to
+        :param z: The number of the floor
+        """
+        east, south = self.carve_floor()
+        width = self.width
+        end = 8 * width
+        base = z * width * self.height
+        marks = bytearray(width * self.height)
+        for rooms, marker in ((self.starts, "X"), (self.goals, "G")):
+            for index in rooms:
+                if base <= index < base + len(marks):
+                    marks[index - base] = ord(marker)
+
+        f.write("Floor #%d\n" % z)
+        f.write("|-------" * width + "|\n")
+        for y in range(self.height):
+            row = y * width
+            if y > 0:
+                north = south[row - width:row]
+                top = bytearray(b"|-------" * width + b"|\n")
+                top[4:end:8] = north.translate(DASH_IF_WALL)
+                pipes = north.translate(PIPE_IF_OPEN)
+                top[3:end:8] = pipes
+                top[5:end:8] = pipes
+                f.write(top.decode("latin-1"))
+
+            borders = east[row:row + width - 1]
+            side = bytearray(b"|       " * width + b"|\n")
+            side[8:end:8] = borders.translate(DASH_IF_OPEN)
+            middle = bytearray(b"|       " * width + b"|\n")
+            middle[8:end:8] = borders.translate(PIPE_IF_WALL)
+            middle[2:end:8] = self.up[base + row:base + row + width].translate(SPACE_IF_NONE)
+            middle[4:end:8] = marks[row:row + width].translate(SPACE_IF_NONE)
+            middle[6:end:8] = self.down[base + row:base + row + width].translate(SPACE_IF_NONE)
+            f.write(side.decode("latin-1"))
+            f.write(middle.decode("latin-1"))
+            f.write(side.decode("latin-1"))
+        f.write("|-------" * width + "|\n\n")
+
+    def write(self, f):
+        """
+        Generates the maze and writes it to f in the .maze format
+        :param f: Text stream to write to
+        """
+        self.place_stairs()
+        self.place_start_and_goal()
+        f.write("Width: %d\nHeight: %d\nFloors: %d\n\n" % (self.width, self.height, self.floors))
+        # floors are written from the top floor down, like the hand made mazes
+        for z in range(self.floors - 1, -1, -1):
+            self.write_floor(f, z)
+
+
+def parse_options(argv):
+    """
+    Splits the command line in positional arguments and --name=value options
+    :return: (arguments, options dict)
+    """
+    args = [arg for arg in argv if not arg.startswith("--")]
+    options = {}
+    for arg in argv:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+    return args, options
+
+
+if __name__ == "__main__":
+    args, options = parse_options(sys.argv[1:])
+    if len(args) < 3:
+        print("Usage: python3 maze_generator.py WIDTH HEIGHT FLOORS [file.maze] [--seed=N] [--branching=P] "
+              "[--loops=P] [--costs=P] [--max-cost=N] [--stairs=P] [--one-way=P] [--starts=N] [--goals=N]")
+        exit(-1)
+    generator = MazeGenerator(int(args[0]), int(args[1]), int(args[2]),
+                              seed=int(options["seed"]) if "seed" in options else None,
+                              branching=float(options.get("branching", 0.0)),
+                              loops=float(options.get("loops", 0.0)),
+                              costs=float(options.get("costs", 0.0)),
+                              max_cost=int(options.get("max-cost", 9)),
+                              stairs=float(options.get("stairs", 0.01)),
+                              one_way=float(options.get("one-way", 0.0)),
+                              starts=int(options.get("starts", 1)),
+                              goals=int(options.get("goals", 1)))
+    if len(args) > 3:
+        with open(args[3], "w") as out:
+            generator.write(out)
+    else:
+        generator.write(sys.stdout)
@@ -1,152 +1,453 @@
 #!/usr/bin/env python3
 from fringe import Fringe
 from state import State
+from closed_set import ClosedSet, BestCost
+from heuristics import make_heuristic, make_nearest_heuristic
+from node_pool import NodePool
+from bidirectional import bidirectional_bfs, bidirectional_astar
+from jump_points import make_jump_neighbors, expand_jumps
+from hpa import hpa_star
+from anytime import ara_star
+from memory_bounded import sma_star, beam_search
+from search_events import Events, finish, DEFAULT_BATCH_SIZE
 
 
-def heuristic(room, goal):
+# all algorithms solve_maze_general can use
+ALGORITHMS = ("DFS", "IDS", "BFS", "UCS", "ASTAR", "GREEDY", "BIBFS", "BIASTAR", "IDASTAR", "JPS", "HPA", "ARASTAR",
+              "SMASTAR", "BEAM")
+# the algorithms that can search from several start rooms to the nearest of several goal rooms
+NEAREST_ALGORITHMS = ("BFS", "DFS", "UCS", "GREEDY", "ASTAR")
+
+
+def bounded_dfs(maze, fr, limit, measure, goal, stats=None, events=None):
     """
-    Returns heuristic value between a room and the goal room
-    :param room: current room
-    :param goal: goal room
-    :return: int
+    Depth first search that does not expand states above a limit. Only the rooms on the path to the
+    state that is expanded are remembered (to avoid cycles), so memory is linear in the path length.
+    :param maze: maze which is searched
+    :param fr: STACK fringe containing the start state
+    :param limit: states for which measure(state) > limit are not expanded
+    :param measure: function giving the value of a state that is compared with the limit
+    :param goal: index of the goal room
+    :param stats: SearchStats to count the expansions in, None to not count them
+    :param events: search_events.Events that gets the expansions, None to not make events
+    :return: Generator of event batches (see search_events.py) that returns
+             (goal state or None, lowest measure above the limit of a state that was cut off, inf if none)
     """
+    path = []           # room indices from the start to the state that is expanded
+    on_path = set()
+    next_limit = float("inf")
+
+    while not fr.is_empty():
+        cost, state = fr.pop()
+        depth = state.get_depth()
+        # the parent of this state is path[depth - 1], the rooms after it are done
+        while len(path) > depth:
+            on_path.discard(path.pop())
+
+        value = measure(state)
+        if value > limit:
+            next_limit = min(next_limit, value)
+            continue
+
+        index = state.get_room().get_index()
+        if index == goal:
+            return state, next_limit  # When the goal is reached, return the state
+
+        path.append(index)
+        on_path.add(index)
+        if stats is not None:
+            stats.expanded += 1
+            pushed = fr.get_insertions()
+        successors = maze.neighbors(index)
+        for new_index, step_cost in successors:
+            if new_index not in on_path:
+                new_state = State(maze.get_room_by_index(new_index), state, state.get_cost() + step_cost)
+                fr.push(new_state)
+        if stats is not None:
+            pushed = fr.get_insertions() - pushed
+            stats.generated += pushed
+            stats.duplicates += len(successors) - pushed
+        if events is not None and events.add(index, state.get_cost(), value, fr.get_size()):
+            yield events.take()
 
-    room_coords = room.get_coords()
-    goal_coords = goal.get_coords()
-    return abs(room_coords[0] - goal_coords[0]) + abs(room_coords[1] - goal_coords[1])
+    return None, next_limit  # No solution found
 
 
-def depth_limited(fr, visited, depth_limit):
+def depth_limited(maze, fr, depth_limit, goal, stats=None, events=None):
     """
     Performs search with a limited depth
+    :maze: maze which is searched
     :fr: fringe containing rooms
-    :visited: list of visited rooms
     :depth_limit: int that resembles the limit
-    :return: goal state
+    :goal: index of the goal room
+    :stats: SearchStats to count the expansions in, None to not count them
+    :events: search_events.Events that gets the expansions, None to not make events
+    :return: Generator of event batches that returns (goal state or None, True if states were cut off at the
+             depth limit)
     """
-  
-    while not fr.is_empty() and depth_limit >= 0:
-        cost, state = fr.pop()
-        room = state.get_room()
-
-        if room.is_goal():
-            return state  # When the goal is reached, return the state
-
-        visited.append(room)
-
-        for d in room.get_connections():
-            new_room, cost = room.make_move(d, state.get_cost())
-            if new_room not in visited:
-                new_state = State(new_room, state, cost)
-                fr.push(new_state)
-    
-    return None  # No solution found
+    solution, next_limit = yield from bounded_dfs(maze, fr, depth_limit, State.get_depth, goal, stats, events)
+    return solution, next_limit != float("inf")
 
 
-def ids(maze):
+def ids(maze, backend="FAST", start=None, goal=None, stats=None, events=None):
     """
     Performs iterative deepening search in a maze
     :param maze: maze which is used for IDS
-    :return: solution/path of maze
+    :param backend: backend of the fringe, FAST or THREADSAFE
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param stats: SearchStats that gets the counters of all iterations, None to not count
+    :param events: search_events.Events that gets the expansions, None to not make events
+    :return: Generator of event batches that returns (solution/path of maze or None, fringe of the last iteration)
     """
+    start, goal = get_endpoints(maze, start, goal)
 
     depth = 0
     while True:
-        fr = Fringe("STACK")
-        room = maze.get_room(*maze.get_start())
+        fr = Fringe("STACK", backend)
+        room = maze.get_room_by_index(start)
         state = State(room, None)
         fr.push(state)
-        visited = []
-        
-        solution = depth_limited(fr, visited, depth)
-        if solution is not None:
-            return solution
+
+        solution, cut_off = yield from depth_limited(maze, fr, depth, goal, stats, events)
+        if stats is not None:
+            stats.iterations += 1
+            stats.add_fringe(fr)
+        if solution is not None or not cut_off:
+            return solution, fr  # solved, or the whole reachable maze is searched
         depth += 1
 
 
-def solve_maze_general(maze, algorithm):
+def ida_star(maze, backend="FAST", heuristic_name="MANHATTAN", start=None, goal=None, stats=None, events=None):
     """
-    Finds a path in a given maze with the given algorithm
-    :param maze: The maze to solve
-    :param algorithm: The desired algorithm to use
+    Performs iterative deepening A* in a maze: depth first searches with an increasing bound on
+    f = cost + heuristic. Each new bound is the lowest f that exceeded the previous bound.
+    :param maze: maze which is used for IDA*
+    :param backend: backend of the fringe, FAST or THREADSAFE
+    :param heuristic_name: The heuristic to use, see heuristics.make_heuristic
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param stats: SearchStats that gets the counters of all iterations, None to not count
+    :param events: search_events.Events that gets the expansions, None to not make events
+    :return: Generator of event batches that returns (solution/path of maze or None, fringe of the last iteration)
+    """
+    start, goal = get_endpoints(maze, start, goal)
+    start_room = maze.get_room_by_index(start)
+    h = make_heuristic(maze, heuristic_name, goal)
+
+    def f(state):
+        return state.get_cost() + h(state.get_room().get_index())
+
+    bound = h(start_room.get_index())
+    while True:
+        fr = Fringe("STACK", backend)
+        fr.push(State(start_room, None))
+
+        solution, bound = yield from bounded_dfs(maze, fr, bound, f, goal, stats, events)
+        if stats is not None:
+            stats.iterations += 1
+            stats.add_fringe(fr)
+        if solution is not None or bound == float("inf"):
+            return solution, fr
+
+
+def print_solution(maze, state, *fringes, render="FULL"):
+    """
+    Prints the result of a search: whether it is solved, the statistics of the fringe(s) and the path
+    :param maze: The maze that was solved
+    :param state: The state of the goal room, None if no solution is found
+    :param fringes: The fringe(s) used by the search
+    :param render: How much of the maze is drawn with the path, see renderer.RENDER_MODES
     :return: True if solution is found, False otherwise
     """
+    if state is None:
+        print("not solved")     # fringe is empty and goal is not found, so maze is not solved
+        for fr in fringes:
+            fr.print_stats()    # print the statistics of the fringe
+        return False
+
+    # if room is the goal, print that with the statistics and the path and return
+    print("solved")
+    for fr in fringes:
+        fr.print_stats()
+    state.print_path()
+    state.print_actions()
+    print()  # print newline
+    maze.print_maze_with_path(state, mode=render)
+    return True
+
+
+def best_first(maze, algorithm, backend="FAST", heuristic_name="MANHATTAN", start=None, goal=None, stats=None,
+               events=None, starts=None, goals=None):
+    """
+    Graph search for BFS, DFS, UCS, GREEDY, ASTAR and JPS; they only differ in the fringe, the priority and
+    the moves. JPS is ASTAR that jumps over straight corridors, see jump_points.py
+    :param maze: The maze to solve
+    :param algorithm: BFS, DFS, UCS, GREEDY, ASTAR or JPS
+    :param backend: backend of the fringe, FAST (deque/heapq) or THREADSAFE (queue lib)
+    :param heuristic_name: heuristic of GREEDY and ASTAR
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param stats: SearchStats to count the expansions in, None to not count them
+    :param events: search_events.Events that gets the expansions, None to not make events
+    :param starts: List of start room indices instead of start: all of them are put in the fringe at once
+    :param goals: List of goal room indices instead of goal: the search stops at the first of them that is
+                  reached, GREEDY and ASTAR estimate the cost to the nearest one. Not for JPS.
+    :return: Generator of event batches (see search_events.py) that returns
+             (state of the goal room or None if no solution is found, [fringe])
+    When the maze has its components (see components.py), the rooms that can not reach the goal are skipped.
+    When the maze has its reduced graph (see contraction.py), UCS and ASTAR search that graph.
+    """
+    # the search nodes are kept in a NodePool, the fringes only hold node ids
+    pool = NodePool()
+
     # select the right fringe for each algorithm
     if algorithm == "BFS":
-        fr = Fringe("FIFO")
+        fr = Fringe("FIFO", backend)
     elif algorithm == "DFS":
-        fr = Fringe("STACK")
-    elif algorithm == "UCS" or "GREEDY" or "ASTAR":
-        fr = Fringe("PRIORITY")
+        fr = Fringe("STACK", backend)
     else:
-        print("Algorithm not found/implemented, exit")
-        return
+        # every room is at most once in the INDEXED fringe, the queue lib has no such fringe
+        fr = Fringe("PRIORITY" if backend == "THREADSAFE" else "INDEXED", backend, key=pool.get_room)
+
+    # create a node with the start room and no parent and put it in fringe, for every start room
+    start, goal = get_endpoints(maze, start, goal)
+    starts = [start] if starts is None else starts
+    # the goal set is only used for several goals (or a goal list), one goal is tested with index == goal
+    goal_rooms = None if goals is None else frozenset(goals)
+    goals = [goal] if goals is None else goals
 
-    # get the start room, create state with start room and None as parent and put it in fringe
-    start_room = maze.get_room(*maze.get_start())
-    goal_room = maze.get_room(*maze.get_goal())
-    
-    if algorithm == "BFS" or "DFS" or "UCS":
-        state = State(start_room, None)
-    elif algorithm == "GREEDY" or "ASTAR":
-        start_priority = heuristic(start_room, goal_room)
-        state = State(start_room, None, priority=start_priority)
-    elif algorithm == "IDS":
-        solution = ids(maze)
-        if solution:
-            print("solved")
-            fr.print_stats()
-            state.print_path()
-            state.print_actions()
-            print()  # print newline
-            maze.print_maze_with_path(state)
-            return True
-        else:
-            print("not solved")     # fringe is empty and goal is not found, so maze is not solved
-            fr.print_stats()        # print the statistics of the fringe
-            return False
-
-    fr.push(state)
-    visited = []
+    informed = algorithm in ("GREEDY", "ASTAR", "JPS")
+    if informed and goal_rooms is None:
+        h = make_heuristic(maze, heuristic_name, goal)
+    elif informed:
+        h = make_nearest_heuristic(maze, heuristic_name, goals)
+    for room in starts:
+        start_priority = h(room) if informed else 0
+        fr.push(pool.add(room, NodePool.NO_PARENT, 0, start_priority), start_priority)
+
+    visited = ClosedSet(maze)
+    # UCS and A* keep the cheapest known cost per room and drop every dominated duplicate
+    uses_cost = algorithm in ("UCS", "ASTAR", "JPS")
+    # with the reduced graph of the maze (see contraction.py) the moves go from node to node. An edge can stand
+    # for many moves, so only the searches ordered by cost use it: BFS, DFS and GREEDY count an edge as one move
+    contraction = maze.contraction
+    if contraction is not None and (algorithm not in ("UCS", "ASTAR") or not contraction.covers(*starts, *goals)):
+        contraction = None
+    if algorithm == "JPS":
+        expand = make_jump_neighbors(maze, goal)
+    elif contraction is not None:
+        expand = contraction.neighbors
+    else:
+        expand = maze.neighbors
+    best_cost = BestCost(maze)
+    for room in starts:
+        best_cost.improve_index(room, 0)
+    # rooms from which the goal can not be reached are never put in the fringe, None if there are none
+    reaching = None
+    if maze.components is not None and len(goals) == 1:
+        reaching = maze.components.rooms_reaching(goals[0])
 
     while not fr.is_empty():
 
-        # get item from fringe and get the room from that state
-        cost, state = fr.pop()
-        room = state.get_room()
+        # get node from fringe and get the room from that node
+        priority, node = fr.pop()
+        index = pool.rooms[node]
+        cost = pool.costs[node]
 
-        if room.is_goal():
-            # if room is the goal, print that with the statistics and the path and return
-            print("solved")
-            fr.print_stats()
-            state.print_path()
-            state.print_actions()
-            print()  # print newline
-            maze.print_maze_with_path(state)
-            return True
+        if uses_cost:
+            if cost > best_cost.get_by_index(index):
+                if stats is not None:
+                    stats.duplicates += 1
+                continue    # a cheaper path to this room was found after this node was pushed
+        elif visited.contains_index(index):
+            if stats is not None:
+                stats.duplicates += 1
+            continue
 
-        visited.append(room)
+        if index == goal if goal_rooms is None else index in goal_rooms:
+            if algorithm == "JPS":
+                path = expand_jumps(maze, [pool.rooms[n] for n in pool.get_path(node)])
+                return State.from_path(maze, path), [fr]
+            if contraction is not None:
+                path = contraction.expand_path([pool.rooms[n] for n in pool.get_path(node)])
+                return State.from_path(maze, path), [fr]
+            return pool.to_state(maze, node), [fr]
 
-        for d in room.get_connections():
+        if stats is not None:
+            stats.expanded += 1
+            if visited.contains_index(index):
+                stats.reopened += 1
+        visited.add_index(index)
+
+        successors = expand(index)
+        if reaching is not None:
+            successors = [move for move in successors if reaching[move[0]]]
+        pushed = 0      # an INDEXED fringe does not count lowering the priority of a room as an insertion
+        for new_index, step_cost in successors:
             # loop through every possible move
-            new_room, cost = room.make_move(d, state.get_cost())    # Get new room after move and cost to get there
-            if new_room not in visited:
-                new_state = State(new_room, state, cost)            # Create new state with new room and old room
+            new_cost = cost + step_cost                             # cost to get to the new room
+            if uses_cost:
+                is_new = best_cost.improve_index(new_index, new_cost)
+            else:
+                is_new = not visited.contains_index(new_index)
+            if is_new:
                 if algorithm == "UCS":
-                    fr.push(new_state, cost)                        # Push state as a tuple (cost, state), which adds priority into the heapq
+                    new_priority = new_cost
                 elif algorithm == "GREEDY":
-                    heuristic_cost = heuristic(new_room, goal_room)
-                    new_state = State(new_room, state, state.get_cost() + cost, heuristic_cost)
-                    fr.push(new_state)
-                elif algorithm == "ASTAR":
-                    total_cost = state.get_cost() + cost
-                    new_priority = total_cost + heuristic(new_room, goal_room)
-                    new_state = State(new_room, state, total_cost, new_priority)
-                    fr.push(new_state)
+                    new_priority = h(new_index)
+                elif algorithm in ("ASTAR", "JPS"):
+                    new_priority = new_cost + h(new_index)
                 else:
-                    fr.push(new_state)                              # push the new state
+                    new_priority = 0
+                # push the node as a tuple (priority, node id), ties are broken on the node id
+                fr.push(pool.add(new_index, node, new_cost, new_priority), new_priority)
+                pushed += 1
+        if stats is not None:
+            stats.generated += pushed
+            stats.duplicates += len(successors) - pushed
+        if events is not None and events.add(index, cost, priority, fr.get_size()):
+            yield events.take()
+
+    return None, [fr]
+
+
+def get_endpoints(maze, start, goal):
+    """
+    :return: (start, goal) room indices, the start and goal of the maze where start or goal is None
+    """
+    if start is None:
+        start = maze.get_index(maze.get_start())
+    if goal is None:
+        goal = maze.get_index(maze.get_goal())
+    return start, goal
+
+
+def search_steps(maze, algorithm, backend="FAST", heuristic_name="MANHATTAN", start=None, goal=None, stats=None,
+                 budget=None, memory_limit=None, beam_width=None, starts=None, goals=None,
+                 batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Finds a path like search, but yields the expansions while it searches, e.g. to draw the search live:
+
+        steps = search_steps(maze, "ASTAR", batch_size=500)
+        for batch in steps:         # lists of search_events.Expansion
+            ...
+
+    The result of the search is the value the generator returns (see search_events.finish).
+    :param batch_size: The number of expansions in every yielded list but the last, None to yield nothing
+    The other parameters are those of search.
+    :return: Generator of lists of Expansion events that returns
+             (state of the goal room or None if no solution is found, list of the fringes used)
+    """
+    events = Events(batch_size) if batch_size is not None else None
+    nearest = starts is not None or goals is not None
+    if nearest and algorithm not in NEAREST_ALGORITHMS:
+        raise ValueError("%s can not search from several starts or to several goals" % algorithm)
+    if maze.components is not None:
+        start, goal = get_endpoints(maze, start, goal)
+        if not any(maze.components.reaches(from_room, to_room) for from_room in (starts or [start])
+                   for to_room in (goals or [goal])):
+            return None, []
+    if algorithm == "IDS":
+        solution, fr = yield from ids(maze, backend, start, goal, stats, events)
+        fringes = [fr]
+    elif algorithm == "IDASTAR":
+        solution, fr = yield from ida_star(maze, backend, heuristic_name, start, goal, stats, events)
+        fringes = [fr]
+    elif algorithm == "BIBFS":
+        solution, fringes = yield from bidirectional_bfs(maze, backend, start, goal, stats, events)
+    elif algorithm == "BIASTAR":
+        solution, fringes = yield from bidirectional_astar(maze, backend, heuristic_name, start, goal, stats,
+                                                           events)
+    elif algorithm == "HPA":
+        solution, fr = yield from hpa_star(maze, backend, heuristic_name, start, goal, stats, events)
+        fringes = [fr]
+    elif algorithm == "ARASTAR":
+        solution, fr = yield from ara_star(maze, backend, heuristic_name, start, goal, budget, stats, events)
+        fringes = [fr]
+    elif algorithm == "SMASTAR":
+        solution, fr = yield from sma_star(maze, backend, heuristic_name, start, goal, memory_limit, stats,
+                                              events)
+        fringes = [fr]
+    elif algorithm == "BEAM":
+        solution, fr = yield from beam_search(maze, backend, heuristic_name, start, goal, beam_width, stats,
+                                                 events)
+        fringes = [fr]
+    elif algorithm in ("BFS", "DFS", "UCS", "GREEDY", "ASTAR", "JPS"):
+        solution, fringes = yield from best_first(maze, algorithm, backend, heuristic_name, start, goal, stats,
+                                                  events, starts, goals)
+    else:
+        raise ValueError("Unknown algorithm: " + str(algorithm))
+    # IDS, IDA* and ARA* count their iterations and fringes themselves
+    if stats is not None and algorithm not in ("IDS", "IDASTAR", "ARASTAR"):
+        stats.iterations += 1
+        for fr in fringes:
+            stats.add_fringe(fr)
+    if events is not None and events.batch:
+        yield events.take()
+    return solution, list(fringes)
+
+
+def search(maze, algorithm, backend="FAST", heuristic_name="MANHATTAN", start=None, goal=None, stats=None,
+           budget=None, memory_limit=None, beam_width=None, starts=None, goals=None):
+    """
+    Finds a path in a given maze with the given algorithm, without printing anything. With stats, every
+    algorithm counts its expansions and its fringes; HPA counts the expansions of the abstract nodes.
+    When the maze has its components (see components.py), a goal that can not be reached from the start is
+    found without searching: no fringes are used. See search_steps to follow the search while it runs.
+    :param maze: The maze to solve
+    :param algorithm: The desired algorithm to use, one of ALGORITHMS
+    :param backend: backend of the fringe, FAST (deque/heapq) or THREADSAFE (queue lib)
+    :param heuristic_name: heuristic of the informed searches: MANHATTAN, FLOOR or ALT (see heuristics.py)
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param stats: SearchStats to fill, None to not count anything
+    :param budget: anytime.Budget of ARASTAR, None for the default budget
+    :param memory_limit: The most search nodes SMASTAR keeps, None for the default
+    :param beam_width: The number of rooms BEAM expands per depth, None for the default
+    :param starts: List of start room indices for the nearest-goal search, which puts all of them in the
+                   fringe at once, None for only start. Only for NEAREST_ALGORITHMS.
+    :param goals: List of goal room indices for the nearest-goal search, which stops at the first goal room
+                  that is reached, None for only goal. Only for NEAREST_ALGORITHMS.
+    :return: (state of the goal room or None if no solution is found, list of the fringes used)
+    """
+    return finish(search_steps(maze, algorithm, backend, heuristic_name, start, goal, stats, budget, memory_limit,
+                               beam_width, starts, goals, batch_size=None))
+
+
+def solve_maze_general(maze, algorithm, backend="FAST", heuristic_name="MANHATTAN", render="FULL", stats=None,
+                       budget=None, memory_limit=None, beam_width=None, nearest=False):
+    """
+    Finds a path in a given maze with the given algorithm
+    :param maze: The maze to solve
+    :param algorithm: The desired algorithm to use
+    :param backend: backend of the fringe, FAST (deque/heapq) or THREADSAFE (queue lib)
+    :param heuristic_name: heuristic of the informed searches: MANHATTAN, FLOOR or ALT (see heuristics.py)
+    :param render: How much of the maze is drawn with the path: FULL, FLOORS, WINDOW or NONE (see renderer.py)
+    :param stats: SearchStats that gets the counters and the search and render times, None to not measure
+    :param budget: anytime.Budget with the weights, limits and report function of ARASTAR
+    :param memory_limit: The most search nodes SMASTAR keeps, None for the default
+    :param beam_width: The number of rooms BEAM expands per depth, None for the default
+    :param nearest: If True, the path from any start room of the maze to the nearest goal room is searched,
+                    only for NEAREST_ALGORITHMS
+    :return: True if solution is found, False otherwise
+    """
+    if algorithm not in ALGORITHMS:
+        print("Algorithm not found/implemented, exit")
+        return
 
+    starts = goals = None
+    if nearest:
+        starts = [maze.get_index(coords) for coords in maze.get_starts()]
+        goals = [maze.get_index(coords) for coords in maze.get_goals()]
 
-    print("not solved")     # fringe is empty and goal is not found, so maze is not solved
-    fr.print_stats()        # print the statistics of the fringe
-    return False
+    if stats is None:
+        solution, fringes = search(maze, algorithm, backend, heuristic_name, budget=budget,
+                                   memory_limit=memory_limit, beam_width=beam_width, starts=starts, goals=goals)
+        return print_solution(maze, solution, *fringes, render=render)
+    with stats.phase("search"):
+        solution, fringes = search(maze, algorithm, backend, heuristic_name, stats=stats, budget=budget,
+                                   memory_limit=memory_limit, beam_width=beam_width, starts=starts,
+                                   goals=goals)
+    with stats.phase("render"):
+        return print_solution(maze, solution, *fringes, render=render)
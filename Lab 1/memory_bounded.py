@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Searches that keep a bounded number of search nodes, so they never fill the fringe (which stops the program)
+and return the best path they can find within their memory instead.
+
+SMASTAR  Simplified Memory-bounded A*. When more nodes than the memory limit are in memory, the leaf with the
+         highest f (the shallowest one on ties) is forgotten and its f is backed up to its parent, which goes
+         back in the fringe to generate the forgotten moves again when they are the most promising ones. A
+         path of at most memory limit rooms fits, so the path is the cheapest one when that holds for the
+         cheapest path. Otherwise a more expensive path that fits is returned, or none. Paths to a room are
+         compared with the paths to it that are in memory and to the last rooms that left memory only, so that
+         bookkeeping grows with the limit and not with the maze.
+BEAM     Beam search: breadth first, but only the width best rooms (lowest g + h) of every depth are expanded.
+         It continues after the first path to the goal and keeps the cheapest one, which is not always the
+         cheapest path of the maze. A room is only expanded again on a cheaper path than the ones that were in
+         the beam in the last KEPT_DEPTHS depths, so a room that was dropped from the beam can still be reached
+         on another route. It stops at the depth of the longest path without loops (the number of rooms), which
+         can take long when the goal can not be reached: search finds that with the components first.
+"""
+from collections import deque
+from fringe import Fringe, IndexedHeap
+from state import State
+from heuristics import make_heuristic
+
+INFINITY = float("inf")
+DEFAULT_MEMORY_LIMIT = 10000    # nodes of SMASTAR
+ROOMS_PER_NODE = 8              # rooms that left memory that SMASTAR still knows the best path to, per node
+DEFAULT_BEAM_WIDTH = 100        # rooms per depth of BEAM
+KEPT_DEPTHS = 8                 # depths of BEAM whose rooms are remembered, at most width rooms each
+
+
+class Node:
+    """A search node of SMA*, only the nodes that are in memory exist"""
+    __slots__ = ("number", "index", "g", "f", "depth", "parent", "children", "pending")
+
+    def __init__(self, number, index, g, f, parent, moves):
+        self.number = number        # key in the fringe and in the heap of leaves
+        self.index = index          # index of the room
+        self.g = g
+        self.f = f                  # g + h, then the lowest f below the node (backed up)
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.parent = parent
+        self.children = {}          # room index -> Node, the children that are in memory
+        # (room index, step cost, f) of the moves that are not in memory, in the order they are generated: f is
+        # None for a move that was never generated and the backed up f of a child that was forgotten
+        self.pending = [(index, step_cost, None) for index, step_cost in moves]
+
+
+def node_number(node):
+    """
+    :return: The number of a node, the key of the fringe of SMA*
+    """
+    return node.number
+
+
+def sma_star(maze, backend="FAST", heuristic_name="MANHATTAN", start=None, goal=None, memory_limit=None,
+             stats=None, events=None):
+    """
+    Simplified Memory-bounded A*, see the top of this file
+    :param maze: The maze to solve
+    :param backend: backend of the fringe, the fringe is always INDEXED so only FAST is used
+    :param heuristic_name: The heuristic to use, see heuristics.make_heuristic
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param memory_limit: The most nodes kept in memory, by default DEFAULT_MEMORY_LIMIT
+    :param stats: SearchStats to count the expansions in, None to not count them. A node that generates
+                  forgotten children again counts as reopened.
+    :param events: search_events.Events that gets the expansions, None to not make events
+    :return: Generator of event batches (see search_events.py) that returns
+             (state of the goal room or None if no path fits in memory, fringe)
+    """
+    if start is None:
+        start = maze.get_index(maze.get_start())
+    if goal is None:
+        goal = maze.get_index(maze.get_goal())
+    h = make_heuristic(maze, heuristic_name, goal)
+    # open: the nodes with moves that are not in memory, by lowest f and then deepest
+    fr = Fringe("INDEXED", backend, key=node_number)
+    # the nodes without children in memory that can be forgotten, by highest f and then shallowest
+    leaves = IndexedHeap(node_number)
+    limit = DEFAULT_MEMORY_LIMIT if memory_limit is None else memory_limit
+    limit = max(1, min(limit, fr.get_capacity()))
+
+    numbers = iter(range(1 << 62))
+    root = Node(next(numbers), start, 0, h(start), None, maze.neighbors(start))
+    if start != goal and not root.pending:
+        return None, fr
+    in_memory = 1
+    # room index -> [g, depth, previous room, nodes] of the cheapest path to the room while nodes (> 0) nodes of
+    # the room are in memory, so there are never more entries than nodes. A path that is neither cheaper nor
+    # shorter is not needed, unless it is that same path generated again.
+    best = {start: [0, 0, None, 1]}
+    # room index -> [g, depth, previous room] of the last ROOMS_PER_NODE * limit rooms that left memory, oldest
+    # first. Such an entry is a lot smaller than a node, forgetting them all makes SMA* generate the longer paths
+    # around every loop again.
+    left = {}
+    fr.push(root, (root.f, 0))
+
+    def is_needed(index, g, depth, previous):
+        known = best.get(index)
+        if known is None:
+            known = left.get(index)
+        return known is None or g < known[0] or depth < known[1] or [g, depth, previous] == known[:3]
+
+    def drop(node):
+        """ Counts node out of memory, the entry of its room moves to left when it was the last node of the room """
+        known = best[node.index]
+        known[3] -= 1
+        if not known[3]:
+            del best[node.index]
+            left[node.index] = known[:3]
+            if len(left) > ROOMS_PER_NODE * limit:
+                del left[next(iter(left))]
+
+    def back_up(node):
+        """ Sets the f of node and of its ancestors to the lowest f below them """
+        while node is not None:
+            f = min(min((child.f for child in node.children.values()), default=INFINITY),
+                    min((node.f if lowest is None else lowest for _, _, lowest in node.pending), default=INFINITY))
+            if f == node.f:
+                break
+            node.f = f
+            if fr.remove(node.number):
+                fr.push(node, (f, -node.depth))
+            if leaves.remove(node.number):
+                leaves.put(((-f, node.depth), node))
+            node = node.parent
+
+    def forget_worst(keep):
+        """ Forgets the worst leaf, its parent keeps its f and generates it again when it is the best node """
+        _, node = leaves.get()
+        parent = node.parent
+        del parent.children[node.index]
+        drop(node)
+        fr.remove(node.number)
+        parent.pending.append((node.index, node.g - parent.g, node.f))
+        if parent is not keep:
+            fr.remove(parent.number)
+            fr.push(parent, (parent.f, -parent.depth))
+            if not parent.children and parent.parent is not None:
+                leaves.put(((-parent.f, parent.depth), parent))
+
+    def path_of(node):
+        path = []
+        while node is not None:
+            path.append(node.index)
+            node = node.parent
+        path.reverse()
+        return path
+
+    while not fr.is_empty():
+        (f, _), node = fr.pop()
+        if f == INFINITY:
+            break
+        if node.index == goal:
+            return State.from_path(maze, path_of(node)), fr
+        index, cost = node.index, node.g
+        # the node is not forgotten to make room for its own children
+        leaves.remove(node.number)
+
+        # the moves that were never generated and the forgotten ones. When memory is full the worst leaf is
+        # forgotten for every child, which can be one of the new children: it goes back to node.pending.
+        moves, node.pending = node.pending, []
+        depth = node.depth + 1
+        pushed = 0
+        for new_index, step_cost, lowest in moves:
+            new_g = node.g + step_cost
+            # the deepest path that fits in memory has limit rooms, so a deeper child can only be the goal
+            if depth >= limit - 1 and not (depth == limit - 1 and new_index == goal):
+                continue
+            if not is_needed(new_index, new_g, depth, node.index):
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+            new_moves = maze.neighbors(new_index)
+            if not new_moves and new_index != goal:
+                continue    # a dead end
+            if in_memory >= limit:
+                forget_worst(node)
+                in_memory -= 1
+            known = best.get(new_index)
+            if known is None:
+                known = left.pop(new_index, None)
+                if known is None or (new_g, depth) < (known[0], known[1]):
+                    known = [new_g, depth, node.index]
+                best[new_index] = known + [1]
+            else:
+                if (new_g, depth) < (known[0], known[1]):
+                    known[:3] = new_g, depth, node.index
+                known[3] += 1
+            # the f of a child is never lower than the f of its parent or the f it had before it was forgotten
+            new_f = max(node.f, new_g + h(new_index), 0 if lowest is None else lowest)
+            child = Node(next(numbers), new_index, new_g, new_f, node, new_moves)
+            node.children[new_index] = child
+            in_memory += 1
+            fr.push(child, (new_f, -depth))
+            leaves.put(((-new_f, depth), child))
+            pushed += 1
+        if stats is not None:
+            stats.expanded += 1
+            if any(lowest is not None for _, _, lowest in moves):
+                stats.reopened += 1
+            stats.generated += pushed
+        if node.pending:
+            fr.push(node, (node.f, -node.depth))
+        back_up(node)
+
+        # the nodes with nothing left below them are removed
+        while not node.children and not node.pending:
+            if node.parent is None:
+                return None, fr
+            parent = node.parent
+            del parent.children[node.index]
+            drop(node)
+            in_memory -= 1
+            back_up(parent)
+            node = parent
+        if not node.children and node.parent is not None:
+            leaves.put(((-node.f, node.depth), node))
+        if events is not None and events.add(index, cost, f, fr.get_size()):
+            yield events.take()
+    return None, fr
+
+
+def beam_search(maze, backend="FAST", heuristic_name="MANHATTAN", start=None, goal=None, width=None, stats=None,
+                events=None):
+    """
+    Beam search, see the top of this file
+    :param maze: The maze to solve
+    :param backend: backend of the fringe, FAST (heapq) or THREADSAFE (queue lib)
+    :param heuristic_name: The heuristic to use, see heuristics.make_heuristic
+    :param start: index of the start room, by default the start of the maze
+    :param goal: index of the goal room, by default the goal of the maze
+    :param width: The number of rooms expanded per depth, by default DEFAULT_BEAM_WIDTH
+    :param stats: SearchStats to count the expansions in, None to not count them
+    :param events: search_events.Events that gets the expansions, None to not make events
+    :return: Generator of event batches (see search_events.py) that returns
+             (state of the goal room with the cheapest path found or None, fringe)
+    """
+    if start is None:
+        start = maze.get_index(maze.get_start())
+    if goal is None:
+        goal = maze.get_index(maze.get_goal())
+    h = make_heuristic(maze, heuristic_name, goal)
+    fr = Fringe("PRIORITY", backend)
+    # every room of a depth has at most 6 moves, so the fringe of the next depth never gets full
+    width = DEFAULT_BEAM_WIDTH if width is None else width
+    width = max(1, min(width, fr.get_capacity() // 6))
+
+    # room index -> (lowest g, depth) of the rooms that were in the beam in the last KEPT_DEPTHS depths: a path to
+    # such a room that is not cheaper was already expanded. Rooms that were dropped from the beam or are older are
+    # not in it, a path to them is a new route.
+    kept = {start: (0, 0)}
+    kept_depths = deque([[start]])     # the rooms kept at each of those depths
+    solution = None
+    if start == goal:
+        return State(maze.get_room_by_index(start), None), fr
+    layer = [State(maze.get_room_by_index(start), None)]
+    depth = 0
+    # a path without loops has at most get_size() - 1 moves, a longer one is never cheaper
+    while layer and depth < maze.get_size() - 1:
+        next_cost = {}      # room index -> lowest g of the room at the next depth
+        for state in layer:
+            index = state.get_room().get_index()
+            cost = state.get_cost()
+            successors = maze.neighbors(index)
+            pushed = 0
+            for new_index, step_cost in successors:
+                new_cost = cost + step_cost
+                if new_cost >= kept.get(new_index, (INFINITY,))[0] or new_cost >= next_cost.get(new_index, INFINITY):
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+                new_priority = new_cost + h(new_index)
+                if solution is not None and new_priority >= solution.get_cost():
+                    continue    # can not give a cheaper path to the goal
+                next_cost[new_index] = new_cost
+                new_state = State(maze.get_room_by_index(new_index), state, new_cost)
+                pushed += 1
+                if new_index == goal:
+                    solution = new_state
+                else:
+                    fr.push(new_state, new_priority)
+            if stats is not None:
+                stats.expanded += 1
+                stats.generated += pushed
+            if events is not None and events.add(index, cost, cost + h(index), fr.get_size()):
+                yield events.take()
+        # the best rooms are the next depth, the others are dropped. A room pushed again with a lower g at the
+        # same depth is in the fringe twice, only its cheapest state is used.
+        layer = []
+        depth += 1
+        while not fr.is_empty():
+            _, state = fr.pop()
+            index = state.get_room().get_index()
+            if len(layer) < width and state.get_cost() == next_cost[index]:
+                layer.append(state)
+                next_cost[index] = -1
+                kept[index] = (state.get_cost(), depth)
+            elif stats is not None and state.get_cost() != next_cost[index]:
+                stats.duplicates += 1   # the room was pushed again with a lower g at the same depth
+        # the rooms of the oldest depth are forgotten, unless they were kept again at a later depth
+        kept_depths.append([state.get_room().get_index() for state in layer])
+        if len(kept_depths) > KEPT_DEPTHS:
+            for index in kept_depths.popleft():
+                if kept[index][1] == depth - KEPT_DEPTHS:
+                    del kept[index]
+    return solution, fr
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+from array import array
+from state import State
+
+
+class NodePool:
+    """
+    Compact store of search nodes: parallel arrays of (room index, parent node, cost g, priority f).
+    A node is referred to by its integer id, so fringes hold plain numbers instead of State objects.
+    """
+
+    NO_PARENT = -1
+
+    def __init__(self):
+        self.rooms = array('q')
+        self.parents = array('q')
+        self.costs = array('q')
+        self.priorities = array('d')
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def add(self, room, parent, cost, priority=0):
+        """
+        Stores a new node
+        :param room: The index of the room of the node
+        :param parent: The id of the parent node, NO_PARENT for the start node
+        :param cost: The cost to get to the room
+        :param priority: The priority of the node in the fringe
+        :return: The id of the new node
+        """
+        self.rooms.append(room)
+        self.parents.append(parent)
+        self.costs.append(cost)
+        self.priorities.append(priority)
+        return len(self.rooms) - 1
+
+    def get_room(self, node):
+        """
+        :return: The index of the room of the node
+        """
+        return self.rooms[node]
+
+    def get_cost(self, node):
+        """
+        :return: The cost to get to the room of the node
+        """
+        return self.costs[node]
+
+    def get_path(self, node):
+        """
+        :return: List of the node ids from the start node to node
+        """
+        nodes = []
+        while node != self.NO_PARENT:
+            nodes.append(node)
+            node = self.parents[node]
+        nodes.reverse()
+        return nodes
+
+    def to_state(self, maze, node):
+        """
+        Creates the chain of State objects for the path to a node, e.g. to print it
+        :param maze: The maze the rooms of the nodes are in
+        :param node: The id of the last node of the path
+        :return: The state of node
+        """
+        state = None
+        for n in self.get_path(node):
+            state = State(maze.get_room_by_index(self.rooms[n]), state, self.costs[n], self.priorities[n])
+        return state
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Answers many (start, goal) questions about one maze, which is only loaded once.
+
+usage: python3 query_engine.py file.maze queries.txt [--cache=N] [--algorithm=ALG] [--heuristic=NAME]
+                               [--compact] [--no-cache]
+
+Every line of the queries file is a query "x1 y1 z1 x2 y2 z2" from room (x1, y1, z1) to room (x2, y2, z2),
+empty lines and lines starting with # are skipped.
+"""
+import sys
+from collections import OrderedDict
+from maze import Maze
+from maze_solver import search
+from heuristics import HEURISTICS
+from shortest_paths import dijkstra, UNREACHABLE, NO_PARENT
+
+
+class QueryEngine:
+    """
+    Shortest path queries on one maze. Queries that share a start room are answered from one shortest path
+    tree (a full Dijkstra run from the start), the most recently used trees are kept in an LRU cache.
+    The first query of a start room is answered with a single search, from the second query on (in the same
+    batch or in a later call) the start room gets a tree.
+    """
+
+    def __init__(self, maze, cache_size=16, algorithm="ASTAR", heuristic_name="MANHATTAN"):
+        """
+        :param maze: The maze to answer the queries for
+        :param cache_size: The number of shortest path trees that are kept
+        :param algorithm: The search used for a start room that has no tree, it has to give the cheapest path
+        :param heuristic_name: The heuristic of that search
+        """
+        self.maze = maze
+        self.cache_size = cache_size
+        self.algorithm = algorithm
+        self.heuristic_name = heuristic_name
+        # start room index -> (distances, parents), the least recently used tree first
+        self.trees = OrderedDict()
+        self.asked = {}     # start room index -> number of queries of that start room so far
+        self.hits = 0
+        self.misses = 0
+        self.searches = 0
+
+    def get_tree(self, start):
+        """
+        :param start: The index of the start room
+        :return: (distances, parents) of the shortest path tree of start, see shortest_paths.dijkstra
+        """
+        tree = self.trees.get(start)
+        if tree is not None:
+            self.hits += 1
+            self.trees.move_to_end(start)
+            return tree
+        self.misses += 1
+        tree = dijkstra(self.maze, start)
+        if self.cache_size > 0:
+            self.trees[start] = tree
+            if len(self.trees) > self.cache_size:
+                self.trees.popitem(last=False)
+        return tree
+
+    def uses_tree(self, start, count=1):
+        """
+        Counts the queries of a start room
+        :param start: The index of the start room
+        :param count: The number of new queries of the start room
+        :return: True if the queries are answered from the tree of the start room: it has a tree or it is asked
+                 more than once
+        """
+        asked = self.asked.get(start, 0) + count
+        self.asked[start] = asked
+        return asked > 1 or start in self.trees
+
+    def tree_path(self, tree, goal):
+        """
+        :param tree: (distances, parents) of a shortest path tree
+        :param goal: The index of the goal room
+        :return: (cost, list of room coordinates from the start to the goal), (None, None) if goal is not reached
+        """
+        distances, parents = tree
+        if distances[goal] == UNREACHABLE:
+            return None, None
+        path = []
+        index = goal
+        while index != NO_PARENT:
+            path.append(self.maze.get_coords(index))
+            index = parents[index]
+        path.reverse()
+        return distances[goal], path
+
+    def search_path(self, start, goal):
+        """
+        Answers one query with a single search
+        :param start: The index of the start room
+        :param goal: The index of the goal room
+        :return: (cost, list of room coordinates from the start to the goal), (None, None) if there is no path
+        """
+        self.searches += 1
+        state, _ = search(self.maze, self.algorithm, heuristic_name=self.heuristic_name, start=start, goal=goal)
+        if state is None:
+            return None, None
+        coords, _, _ = state.get_path()
+        return state.get_cost(), coords
+
+    def query(self, start, goal):
+        """
+        :param start: Coordinates (x, y, z) of the start room
+        :param goal: Coordinates (x, y, z) of the goal room
+        :return: (cost, list of room coordinates from the start to the goal), (None, None) if there is no path
+        """
+        start = self.maze.get_index(start)
+        goal = self.maze.get_index(goal)
+        if self.uses_tree(start):
+            return self.tree_path(self.get_tree(start), goal)
+        return self.search_path(start, goal)
+
+    def batch(self, queries):
+        """
+        Answers a list of queries, the queries with the same start room share one shortest path tree
+        :param queries: List of (start coordinates, goal coordinates)
+        :return: List of (cost, path) in the order of the queries, see query
+        """
+        by_start = OrderedDict()
+        for i, (start, goal) in enumerate(queries):
+            by_start.setdefault(self.maze.get_index(start), []).append((i, self.maze.get_index(goal)))
+
+        results = [None] * len(queries)
+        for start, goals in by_start.items():
+            if not self.uses_tree(start, len(goals)):
+                i, goal = goals[0]
+                results[i] = self.search_path(start, goal)
+                continue
+            tree = self.get_tree(start)
+            for i, goal in goals:
+                results[i] = self.tree_path(tree, goal)
+        return results
+
+    def print_stats(self):
+        """ Prints how the queries were answered """
+        print("Trees computed: " + str(self.misses))
+        print("Trees reused: " + str(self.hits))
+        print("Single searches: " + str(self.searches))
+
+
+def read_queries(file_name):
+    """
+    :param file_name: File with one query "x1 y1 z1 x2 y2 z2" per line
+    :return: List of (start coordinates, goal coordinates)
+    """
+    queries = []
+    with open(file_name) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            values = [int(value) for value in line.split()]
+            if len(values) != 6:
+                raise ValueError("A query needs 6 numbers: " + line)
+            queries.append((tuple(values[:3]), tuple(values[3:])))
+    return queries
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            options[name] = value
+    if len(args) != 2:
+        print("Usage: python3 query_engine.py file.maze queries.txt [--cache=N] [--algorithm=ALG] "
+              "[--heuristic=NAME] [--compact] [--no-cache]")
+        exit(-1)
+
+    heuristic_name = options.get("heuristic", "MANHATTAN").upper()
+    if heuristic_name not in HEURISTICS:
+        print("Heuristic " + heuristic_name + " is not supported, use one of " + ", ".join(HEURISTICS))
+        exit(-1)
+    algorithm = options.get("algorithm", "ASTAR").upper()
+    if algorithm not in ("UCS", "ASTAR", "BIASTAR", "IDASTAR", "JPS"):
+        print("Algorithm " + algorithm + " does not give the cheapest path, use UCS, ASTAR, BIASTAR, IDASTAR or JPS")
+        exit(-1)
+
+    maze = Maze(args[0], compact="compact" in options, use_cache="no-cache" not in options)
+    engine = QueryEngine(maze, int(options.get("cache", 16)), algorithm, heuristic_name)
+    queries = read_queries(args[1])
+    for (start, goal), (cost, path) in zip(queries, engine.batch(queries)):
+        if cost is None:
+            print("%s -> %s: not reachable" % (start, goal))
+        else:
+            print("%s -> %s: cost=%d moves=%d" % (start, goal, cost, len(path) - 1))
+    engine.print_stats()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Draws a maze, optionally with a path, straight from the compact grid. Every floor is built as one string and
+written to the output stream at once. The rooms that are not on the path only depend on their connections
+(and heuristic), so their drawings are looked up in tables that are made once per maze.
+
+modes:
+    FULL    all floors (the same drawing as before)
+    FLOORS  only the floors the path goes through
+    WINDOW  only the part of those floors around the path: the box around the path plus a margin of rooms
+    NONE    nothing is drawn
+"""
+import sys
+from grid import NO_HEURISTIC
+
+RENDER_MODES = ("FULL", "FLOORS", "WINDOW", "NONE")
+UP, DOWN, NORTH, SOUTH, EAST, WEST = range(6)
+
+
+def move_direction(grid, from_index, to_index):
+    """
+    :return: The number of the direction (order as DIRECTIONS) of the move from from_index to to_index
+    """
+    x0, y0, z0 = grid.get_coords(from_index)
+    x1, y1, z1 = grid.get_coords(to_index)
+    if z1 != z0:
+        return UP if z1 > z0 else DOWN
+    if x1 != x0:
+        return EAST if x1 > x0 else WEST
+    return SOUTH if y1 > y0 else NORTH
+
+
+def path_marks(grid, state):
+    """
+    :param grid: The grid of the maze
+    :param state: The last state of a path, None for no path
+    :return: (came_from, goes_to, costs): dicts from room index to the direction back to the previous room,
+             the direction to the next room and the cost to reach the room
+    """
+    came_from, goes_to, costs = {}, {}, {}
+    while state is not None and state.get_parent() is not None:
+        parent = state.get_parent()
+        index = state.get_room().get_index()
+        parent_index = parent.get_room().get_index()
+        came_from[index] = move_direction(grid, index, parent_index)
+        costs[index] = state.get_cost()
+        goes_to[parent_index] = move_direction(grid, parent_index, index)
+        state = parent
+    return came_from, goes_to, costs
+
+
+class Renderer:
+    """Draws the floors of one maze"""
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.grid = maze.grid
+        self.starts = set(self.grid.starts)
+        self.goals = set(self.grid.goals)
+        # the drawings of a room that is not on the path, per connection mask
+        self.line_one = []
+        self.west_wall = []
+        self.line_three = []
+        self.line_four = []
+        for mask in range(64):
+            west = mask & (1 << WEST)
+            self.line_one.append("|--| |--" if mask & (1 << NORTH) else "|-------")
+            self.west_wall.append("-" if west else "|")
+            self.line_three.append("%s %s   %s " % (" " if west else "|", "U" if mask & (1 << UP) else " ",
+                                                    "D" if mask & (1 << DOWN) else " "))
+            self.line_four.append("%s       " % ("-" if west else "|"))
+
+    def room_lines(self, index, print_coords, marks):
+        """
+        :param index: The index of a room
+        :param print_coords: If True, the coordinates are drawn in the room
+        :param marks: (came_from, goes_to, costs) of the path, see path_marks
+        :return: The four lines of the drawing of the room
+        """
+        grid = self.grid
+        mask = grid.masks[index]
+        came_from, goes_to, costs = marks
+        value = grid.heuristics[index]
+        heuristic = "  " if value == NO_HEURISTIC else '{:>2}'.format(value)
+        west = self.west_wall[mask]
+        if index not in came_from and index not in goes_to:
+            line_three = self.line_three[mask]
+            if index in self.starts or index in self.goals:
+                line_three = line_three[:4] + ("X" if index in self.starts else "G") + line_three[5:]
+            if print_coords:
+                line_four = "%s %s %s %s " % ((west,) + grid.get_coords(index))
+            else:
+                line_four = self.line_four[mask]
+            return self.line_one[mask], "%s%s     " % (west, heuristic), line_three, line_four
+
+        back = came_from.get(index)
+        forward = goes_to.get(index)
+        north = "^" if forward == NORTH else ("v" if back == NORTH else " ")
+        line_one = ("|--|%s|--" % north) if mask & (1 << NORTH) else "|-------"
+        cost = '{:>3}'.format(costs[index]) if index in costs else "   "
+        line_two = "%s%s %s%s" % (west, heuristic, north, cost)
+
+        to_west = "<" if forward == WEST else (">" if back == WEST else " ")
+        to_east = ">" if forward == EAST else ("<" if back == EAST else " ")
+        if index in self.starts:
+            middle = "X"
+        elif index in self.goals:
+            middle = "G"
+        elif forward in (UP, DOWN) or back in (UP, DOWN):
+            middle = "o"
+        else:
+            middle = " "
+        line_three = "%s%s%s%s%s%s%s%s" % (" " if mask & (1 << WEST) else "|", to_west,
+                                           "U" if mask & (1 << UP) else " ", to_west, middle, to_east,
+                                           "D" if mask & (1 << DOWN) else " ", to_east)
+        if print_coords:
+            line_four = "%s %s %s %s " % ((west,) + grid.get_coords(index))
+        else:
+            south = "v" if forward == SOUTH else ("^" if back == SOUTH else " ")
+            line_four = "%s   %s   " % (west, south)
+        return line_one, line_two, line_three, line_four
+
+    def floor_string(self, z, print_coords, marks, window=None):
+        """
+        :param z: The number of the floor
+        :param print_coords: If True, the coordinates are drawn in the rooms
+        :param marks: (came_from, goes_to, costs) of the path, see path_marks
+        :param window: (x0, x1, y0, y1) the rooms x0 <= x < x1, y0 <= y < y1 to draw, None for the whole floor
+        :return: The drawing of the floor, ending with a newline
+        """
+        grid = self.grid
+        x0, x1, y0, y1 = window or (0, grid.width, 0, grid.height)
+        lines = []
+        for y in range(y0, y1):
+            first = grid.get_index((x0, y, z))
+            rows = ([], [], [], [])
+            for index in range(first, first + x1 - x0):
+                for row, part in zip(rows, self.room_lines(index, print_coords, marks)):
+                    row.append(part)
+            for row in rows:
+                row.append("|")
+                lines.append("".join(row))
+        lines.append("|-------" * (x1 - x0) + "|")
+        lines.append("")
+        return "\n".join(lines)
+
+    def render(self, state=None, print_coords=False, mode="FULL", margin=2, out=None):
+        """
+        Writes the drawing of the maze to out
+        :param state: The last state of the path to draw, None for no path
+        :param print_coords: If True, the coordinates are drawn in the rooms
+        :param mode: One of RENDER_MODES, FLOORS and WINDOW draw all floors when there is no path
+        :param margin: The number of rooms around the path that are drawn in WINDOW mode
+        :param out: Text stream to write to, by default sys.stdout
+        """
+        if mode == "NONE":
+            return
+        out = sys.stdout if out is None else out
+        grid = self.grid
+        marks = path_marks(grid, state)
+        floors = range(grid.floors - 1, -1, -1)
+        window = None
+        if mode != "FULL" and state is not None:
+            rooms = set(marks[0]) | set(marks[1]) or {state.get_room().get_index()}
+            coords = [grid.get_coords(index) for index in rooms]
+            on_path = {z for _, _, z in coords}
+            floors = [z for z in floors if z in on_path]
+            if mode == "WINDOW":
+                window = (max(0, min(x for x, _, _ in coords) - margin),
+                          min(grid.width, max(x for x, _, _ in coords) + margin + 1),
+                          max(0, min(y for _, y, _ in coords) - margin),
+                          min(grid.height, max(y for _, y, _ in coords) + margin + 1))
+
+        out.write("Width: %d \nHeight: %d \nFloors: %d\n" % (grid.width, grid.height, grid.floors))
+        for z in floors:
+            if window is None:
+                out.write("\nFloor #%d\n" % z)
+            else:
+                out.write("\nFloor #%d, x %d-%d, y %d-%d\n" % (z, window[0], window[1] - 1, window[2], window[3] - 1))
+            out.write(self.floor_string(z, print_coords, marks, window))
@@ -3,12 +3,13 @@
 
 class Room:
 	"""Class to save all the characteristics of a room"""
-	def __init__(self, coords, maze):
+	def __init__(self, coords, maze, index=None):
 		# order: UP, DOWN, NORTH, SOUTH, EAST, WEST
 		self.connections = []
 		self.heuristicValue = 0
 		self.costs = dict()
 		self.coords = coords
+		self.index = index
 		self.__goal = False
 		self.__start = False
 		self.maze = maze
@@ -56,6 +57,12 @@ class Room:
 		"""
 		return self.coords
 
+	def get_index(self):
+		"""
+		:return: The index of the room in the maze grid
+		"""
+		return self.index
+
 	def get_heuristic_value(self):
 		"""
 		:return: The heuristic value of the room
@@ -85,4 +92,4 @@ class Room:
 			y -= 1
 		if direction == "SOUTH":
 			y += 1
-		return self.maze.rooms[x][y][z], cost
+		return self.maze.get_room(x, y, z), cost
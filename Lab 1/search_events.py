@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Expansion events of the searches, to follow a search while it runs (e.g. to draw it live).
+
+Every search is a generator that yields lists of Expansion events and returns its result when it is done:
+
+    steps = search_steps(maze, "ASTAR", batch_size=500)     # see maze_solver.py
+    for batch in steps:
+        draw(batch)
+    # or: solution, fringes = yield from steps
+
+An event is only made when the search gets an Events object, without one the search yields nothing, so
+the blocking search (maze_solver.search) is the same generator run with finish() at no extra cost.
+"""
+from collections import namedtuple
+
+DEFAULT_BATCH_SIZE = 1000
+
+# room: index of the expanded room (see MazeGrid.get_coords), g: cost to reach it, f: the value the search
+# orders the rooms by (g + h for A*, g for UCS, h for GREEDY, the depth for BFS, DFS and IDS),
+# fringe_size: the number of items in the fringe(s) after the expansion
+Expansion = namedtuple("Expansion", ("room", "g", "f", "fringe_size"))
+
+
+class Events:
+    """Collects the expansion events of a search into batches"""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        :param batch_size: The number of events in every batch but the last
+        """
+        self.batch_size = max(1, batch_size)
+        self.batch = []
+
+    def add(self, room, g, f, fringe_size):
+        """
+        Adds the event of an expansion
+        :return: True if the batch is full and has to be yielded (with take)
+        """
+        self.batch.append(Expansion(room, g, f, fringe_size))
+        return len(self.batch) >= self.batch_size
+
+    def take(self):
+        """
+        :return: The list of events collected since the last take
+        """
+        batch = self.batch
+        self.batch = []
+        return batch
+
+
+def finish(steps):
+    """
+    Runs a search generator to the end without looking at the events
+    :param steps: The generator of a search
+    :return: The value returned by the generator, the result of the search
+    """
+    while True:
+        try:
+            next(steps)
+        except StopIteration as end:
+            return end.value
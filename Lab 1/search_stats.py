@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Counters and timings of a search. The solvers take an optional SearchStats and only update it when one is
+given; without it they do exactly the same work as before, so the counters cost nothing when not used.
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
+
+
+class SearchStats:
+    """What a search did and how long each phase took"""
+
+    COUNTERS = ("expanded", "generated", "duplicates", "reopened", "iterations", "heap_pushes", "heap_pops",
+                "peak_fringe")
+
+    def __init__(self, trace_memory=False):
+        """
+        :param trace_memory: If True, the peak memory of every phase is measured with tracemalloc, which slows
+                             the program down. Otherwise the peak memory is the peak RSS of the process.
+        """
+        self.trace_memory = trace_memory
+        self.expanded = 0       # rooms whose neighbors were generated
+        self.generated = 0      # neighbors put in a fringe
+        self.duplicates = 0     # neighbors and fringe entries dropped because the room was already reached
+        self.reopened = 0       # rooms expanded again because a cheaper path to them was found
+        self.iterations = 0     # depth first searches of IDS and IDA*, 1 for the other searches
+        self.heap_pushes = 0    # insertions in the fringes
+        self.heap_pops = 0      # deletions from the fringes
+        self.peak_fringe = 0    # the highest maximum size of a fringe
+        self.peak_memory = None     # bytes
+        self.phases = {}        # phase name -> seconds
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times the code in a with block as the phase name, e.g. load, preprocess, search or render
+        """
+        if self.trace_memory:
+            tracemalloc.start()
+        begin = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - begin
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.peak_memory = max(self.peak_memory or 0, peak)
+            elif resource is not None:
+                # ru_maxrss is in kilobytes on Linux
+                self.peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def add_fringe(self, fr):
+        """
+        Adds the statistics of a fringe that is no longer used
+        :param fr: A Fringe
+        """
+        self.heap_pushes += fr.get_insertions()
+        self.heap_pops += fr.get_deletions()
+        self.peak_fringe = max(self.peak_fringe, fr.get_max_size())
+
+    def to_dict(self):
+        """
+        :return: Dict with all counters, the peak memory and the phase timings
+        """
+        result = {name: getattr(self, name) for name in self.COUNTERS}
+        result["peak_memory"] = self.peak_memory
+        result["phases"] = dict(self.phases)
+        return result
+
+    def to_json(self, file_name=None):
+        """
+        :param file_name: If given, the JSON is also written to this file
+        :return: The statistics as a JSON string
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if file_name is not None:
+            with open(file_name, "w") as f:
+                f.write(text + "\n")
+        return text
+
+    def print_stats(self):
+        """ Prints the statistics """
+        print("#### search statistics:")
+        for name in self.COUNTERS:
+            print("{0}: {1:>{2}d}".format(name.replace("_", " "), getattr(self, name), 20 - len(name)))
+        if self.peak_memory is not None:
+            print("peak memory: {0:>8d}".format(self.peak_memory))
+        for name, seconds in self.phases.items():
+            print("{0} time: {1:>{2}.4f}".format(name, seconds, 15 - len(name)))
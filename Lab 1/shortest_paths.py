@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import heapq
+from array import array
+
+UNREACHABLE = -1
+NO_PARENT = -1
+
+
+def dijkstra(maze, source, reverse=False, target=None):
+    """
+    Computes the cheapest costs from one room to all rooms (or from all rooms to one room)
+    :param maze: The maze to search
+    :param source: The index of the room to start from
+    :param reverse: If True, the connections are followed backwards, which gives the costs to reach source
+    :param target: If given, the search stops when the cost of this room is final
+    :return: (distances, parents): arrays indexed by room index with the cost of the cheapest path
+             (UNREACHABLE if the room is not reached) and the previous room on that path (NO_PARENT for source
+             and rooms that are not reached). With a target, only the rooms that were expanded are final.
+    """
+    n = maze.get_size()
+    distances = array('q', [UNREACHABLE]) * n
+    parents = array('q', [NO_PARENT]) * n
+    done = bytearray(n)
+    expand = maze.predecessors if reverse else maze.neighbors
+    distances[source] = 0
+    heap = [(0, source)]
+    while heap:
+        distance, index = heapq.heappop(heap)
+        if done[index]:
+            continue
+        done[index] = 1
+        if index == target:
+            break
+        for new_index, step_cost in expand(index):
+            new_distance = distance + step_cost
+            old = distances[new_index]
+            if old == UNREACHABLE or new_distance < old:
+                distances[new_index] = new_distance
+                parents[new_index] = index
+                heapq.heappush(heap, (new_distance, new_index))
+    return distances, parents
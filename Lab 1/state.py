@@ -4,11 +4,31 @@ import maze
 
 class State:
 	"""Class to save the possible states in"""
+	__slots__ = ("parent", "room", "cost", "priority", "depth")
+
 	def __init__(self, room, parent, cost=0, priority=0):
 		self.parent = parent
 		self.room = room
 		self.cost = cost
 		self.priority = priority
+		# number of moves from the start state
+		self.depth = 0 if parent is None else parent.depth + 1
+
+	@staticmethod
+	def from_path(maze, path):
+		"""
+		Creates the chain of states along a path of rooms, the costs are the costs of the moves in the maze
+		:param maze: The maze the path is in
+		:param path: List of room indices from the start room to the last room
+		:return: The state of the last room, None if the path is empty
+		"""
+		state = None
+		cost = 0
+		for i, index in enumerate(path):
+			if i > 0:
+				cost += maze.get_step_cost(path[i - 1], index)
+			state = State(maze.get_room_by_index(index), state, cost)
+		return state
 
 	def get_room(self):
 		"""
@@ -23,6 +43,12 @@ class State:
 		"""
 		return self.parent
 
+	def get_depth(self):
+		"""
+		:return: The number of moves from the start state to this state
+		"""
+		return self.depth
+
 	def get_cost(self):
 		"""
 		:return: The cost to get to this state
@@ -36,35 +62,39 @@ class State:
 		"""
 		self.cost = cost
 
-	def print_actions(self, first_call=True):
+	def get_path(self):
+		"""
+		Walks from this state back to the start state, without recursion
+		:return: (coordinates, actions, costs): the coordinates of the rooms from the start state to this state,
+				the direction of each move (one less than the rooms) and the cost to reach each room
+		"""
+		states = []
+		state = self
+		while state is not None:
+			states.append(state)
+			state = state.parent
+		states.reverse()
+		coords = [s.room.coords for s in states]
+		costs = [s.cost for s in states]
+		actions = [maze.Maze.get_move_dir(a, b) for a, b in zip(coords, coords[1:])]
+		return coords, actions, costs
+
+	def print_actions(self):
 		"""
 		Prints the sequence af action from start state to this state
 		"""
-		if first_call:  # if it is the first call to this function, print begin statement
-			print("Sequence of actions: ", end="")
-
-		if self.parent is None:  # no parent, so we are at the start node: return
-			return
-		else:
-			self.parent.print_actions(False)
-			direction = maze.Maze().get_move_dir(self.parent.room.coords, self.room.coords)
-			print(direction[0], end="")
-
-		if first_call:  # if it is the first call to this function, print newline
-			print()
+		coords, actions, costs = self.get_path()
+		print("Sequence of actions: " + "".join(direction[0] for direction in actions))
 
 	def print_path_helper(self):
 		"""
 		Helper function to print the path from start state to this state
 		"""
-		if self.parent is not None:
-			# if it has parent state, then first print path to that state
-			self.parent.print_path_helper()
-			# print previous room and this room and cost till this room
-			string = str(self.parent.room.coords) + " -> "
-			string += str(self.room.coords)
-			string += " cost: " + str(self.cost)
-			print(string)
+		coords, actions, costs = self.get_path()
+		# print previous room and this room and cost till this room
+		lines = [str(coords[i - 1]) + " -> " + str(coords[i]) + " cost: " + str(costs[i]) for i in range(1, len(coords))]
+		if lines:
+			print("\n".join(lines))
 
 	def print_path(self):
 		"""
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compares the searches with and without the reduced graph of contraction.py on random mazes:
+run with python3 -m unittest test_contraction
+"""
+import shutil
+import tempfile
+import unittest
+
+from contraction import get_contraction
+from maze_solver import search
+from test_memory_bounded import random_maze
+
+SEEDS = range(60)
+
+
+def moves(state):
+    """
+    :return: The number of moves of a path, None if there is no path
+    """
+    return None if state is None else state.get_depth()
+
+
+class ContractionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_same_paths_with_the_reduced_graph(self):
+        for seed in SEEDS:
+            with self.subTest(seed=seed):
+                maze = random_maze(self.directory, seed)
+                fewest = moves(search(maze, "BFS")[0])
+                cheapest = search(maze, "UCS")[0]
+                get_contraction(maze)
+                self.assertIsNotNone(maze.contraction)
+                # BFS finds the fewest moves with the reduced graph too, like IDS and BIBFS
+                for algorithm in ("BFS", "IDS", "BIBFS"):
+                    self.assertEqual(moves(search(maze, algorithm)[0]), fewest)
+                for algorithm in ("UCS", "ASTAR"):
+                    found = search(maze, algorithm)[0]
+                    if cheapest is None:
+                        self.assertIsNone(found)
+                    else:
+                        self.assertEqual(found.get_cost(), cheapest.get_cost())
+
+
+if __name__ == "__main__":
+    unittest.main()
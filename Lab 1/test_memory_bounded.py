@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Compares SMASTAR and BEAM with UCS on random mazes: run with python3 -m unittest test_memory_bounded
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from maze import Maze
+from maze_generator import MazeGenerator
+from maze_solver import search
+
+SEEDS = range(60)
+
+
+def random_maze(directory, seed):
+    """
+    :return: Maze made by MazeGenerator with options picked from the seed
+    """
+    options = random.Random(seed)
+    generator = MazeGenerator(options.randint(2, 7), options.randint(2, 5), options.randint(1, 3), seed=seed,
+                              branching=options.random(), loops=options.random() * 0.4,
+                              costs=options.random(), stairs=options.random() * 0.3,
+                              one_way=options.random() * 0.3)
+    file_name = os.path.join(directory, "%d.maze" % seed)
+    with open(file_name, "w") as out:
+        generator.write(out)
+    return Maze(file_name, use_cache=False)
+
+
+class MemoryBoundedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_path(self, maze, state):
+        """ The path of state goes from the start to the goal through open connections and costs what it says """
+        rooms = []
+        while state is not None:
+            rooms.append(state)
+            state = state.get_parent()
+        rooms.reverse()
+        self.assertEqual(rooms[0].get_room().get_index(), maze.get_index(maze.get_start()))
+        self.assertEqual(rooms[-1].get_room().get_index(), maze.get_index(maze.get_goal()))
+        cost = 0
+        for previous, state in zip(rooms, rooms[1:]):
+            cost += maze.get_step_cost(previous.get_room().get_index(), state.get_room().get_index())
+            self.assertEqual(state.get_cost(), cost)
+
+    def test_sma_star_is_optimal_when_the_path_fits(self):
+        for seed in SEEDS:
+            with self.subTest(seed=seed):
+                maze = random_maze(self.directory, seed)
+                best = search(maze, "UCS")[0]
+                if best is None:
+                    self.assertIsNone(search(maze, "SMASTAR")[0])
+                    continue
+                rooms = best.get_depth() + 1
+                for memory_limit in range(rooms, rooms + 4):
+                    found = search(maze, "SMASTAR", memory_limit=memory_limit)[0]
+                    self.assertIsNotNone(found)
+                    self.check_path(maze, found)
+                    self.assertEqual(found.get_cost(), best.get_cost())
+                # with less memory the path that is found (if any) is a real one, but not a cheaper one
+                found = search(maze, "SMASTAR", memory_limit=rooms - 1)[0]
+                if found is not None:
+                    self.check_path(maze, found)
+                    self.assertGreaterEqual(found.get_cost(), best.get_cost())
+
+    def test_wide_beam_is_optimal(self):
+        for seed in SEEDS:
+            with self.subTest(seed=seed):
+                maze = random_maze(self.directory, seed)
+                best = search(maze, "UCS")[0]
+                found = search(maze, "BEAM", beam_width=maze.grid.size)[0]
+                if best is None:
+                    self.assertIsNone(found)
+                    continue
+                self.assertIsNotNone(found)
+                self.check_path(maze, found)
+                self.assertEqual(found.get_cost(), best.get_cost())
+
+    def test_narrow_beam_finds_real_paths(self):
+        for seed in SEEDS:
+            with self.subTest(seed=seed):
+                maze = random_maze(self.directory, seed)
+                best = search(maze, "UCS")[0]
+                for width in (1, 2, 5):
+                    found = search(maze, "BEAM", beam_width=width)[0]
+                    if found is not None:
+                        self.check_path(maze, found)
+                        self.assertGreaterEqual(found.get_cost(), best.get_cost())
+
+
+if __name__ == "__main__":
+    unittest.main()